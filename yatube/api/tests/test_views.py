@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.posts = [
+            Post.objects.create(author=cls.author, group=cls.group,
+                                text=f'Пост {i}')
+            for i in range(15)
+        ]
+        cls.post = cls.posts[-1]
+        Comment.objects.create(post=cls.post, author=cls.author,
+                               text='Комментарий')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_endpoints(self):
+        urls = {
+            reverse('api:posts'): 10,
+            reverse('api:group', args=[self.group.slug]): 10,
+            reverse('api:profile', args=[self.author.username]): 10,
+            reverse('api:comments', args=[self.post.pk]): 1,
+        }
+        for url, count in urls.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['results']), count)
+
+    def test_cursor_pagination(self):
+        data = self.client.get(reverse('api:posts'), {'limit': 10}).json()
+        self.assertEqual(data['results'][0]['id'], self.post.pk)
+        self.assertIsNone(data['previous'])
+        second = self.client.get(data['next']).json()
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next'])
+        self.assertIn('limit=10', data['next'])
+
+    def test_field_selection(self):
+        data = self.client.get(
+            reverse('api:posts'), {'fields': 'id,author'}).json()
+        self.assertEqual(data['results'][0],
+                         {'id': self.post.pk, 'author': 'author'})
+        response = self.client.get(reverse('api:posts'), {'fields': 'id,x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_missing_objects(self):
+        response = self.client.get(reverse('api:group', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('error', response.json())
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304 без запросов к базе, правка — 200."""
+        url = reverse('api:posts')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_comment_changes_comments_etag(self):
+        url = reverse('api:comments', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Ещё один')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_comment_changes_post_list_etag(self):
+        """Число комментариев в ленте API входит в её ETag."""
+        urls = (
+            reverse('api:posts'),
+            reverse('api:group', args=[self.group.slug]),
+            reverse('api:profile', args=[self.author.username]),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Comment.objects.create(post=self.post, author=self.author,
+                               text='Ещё один')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.json()['results'][0]['comments_count'], 2)
@@ -0,0 +1,13 @@
+from django.urls import path
+from . import views
+
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.posts, name='posts'),
+    path('group/<slug>/', views.group_posts, name='group'),
+    path('profile/<str:username>/', views.profile, name='profile'),
+    path('posts/<int:post_id>/comments/', views.comments,
+         name='comments'),
+]
@@ -0,0 +1,139 @@
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from core.cache import GenerationValidators
+from core.paginator import CursorPaginator
+from core.routing import read_from_replica
+from posts import invalidation
+from posts.models import Comment, Group, Post, User
+from posts.utils import CONST_POST
+
+MAX_LIMIT = 100
+
+POST_FIELDS = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date.isoformat(),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group_id else None,
+    'image': lambda post: post.image.url if post.image else None,
+    'thumbnail': lambda post: post.thumbnail_url or None,
+    'comments_count': lambda post: post.comments_count,
+}
+
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.pk,
+    'text': lambda comment: comment.text,
+    'created': lambda comment: comment.created.isoformat(),
+    'author': lambda comment: comment.author.username,
+    'post': lambda comment: comment.post_id,
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def json_errors(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as error:
+            return _error(str(error), 400)
+        except Http404:
+            return _error('Не найдено', 404)
+    return wrapper
+
+
+def api_view(get_scopes):
+    """GET-view API с ответом 304 по ETag и Last-Modified поколений
+    кэша: проверка запроса с If-None-Match не трогает базу."""
+    validators = GenerationValidators(get_scopes)
+
+    def decorator(view):
+        return require_safe(read_from_replica(
+            validators.conditional(json_errors(view))))
+    return decorator
+
+
+def _fields(request, available):
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(available)
+    fields = [field.strip() for field in requested.split(',')]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(unknown)}')
+    return fields
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', CONST_POST))
+    except ValueError:
+        raise BadRequest('limit должен быть числом')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _link(request, name, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params[name] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+def _page(request, queryset, available, key='pub_date'):
+    """Страница объектов по курсору с выбранными полями."""
+    fields = _fields(request, available)
+    page = CursorPaginator(queryset, _limit(request), key=key).page(
+        after=request.GET.get('after'), before=request.GET.get('before'))
+    return JsonResponse({
+        'results': [
+            {field: available[field](obj) for field in fields}
+            for obj in page.object_list
+        ],
+        'next': _link(request, 'after', page.next_cursor),
+        'previous': _link(request, 'before', page.previous_cursor),
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+@api_view(invalidation.with_comment_counts(invalidation.index_scopes))
+def posts(request):
+    return _page(request, Post.objects.for_feed(), POST_FIELDS)
+
+
+@api_view(invalidation.with_comment_counts(invalidation.group_scopes))
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _page(request, Post.objects.for_feed().filter(group=group),
+                 POST_FIELDS)
+
+
+@api_view(invalidation.with_comment_counts(invalidation.profile_scopes))
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return _page(request, Post.objects.for_feed().filter(author=author),
+                 POST_FIELDS)
+
+
+@api_view(invalidation.comments_scopes)
+def comments(request, post_id):
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return _page(
+        request,
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENT_FIELDS,
+        key='created',
+    )
@@ -0,0 +1,260 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from hashlib import md5
+from math import log
+from random import random
+from time import sleep, time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from . import routing
+
+GENERATION_KEY = 'generation:{}'
+LOCK_KEY = 'lock:{}'
+# Префикс 'feed:' держит страницы в LRU процесса (LOCAL_PREFIXES),
+# последняя версия страницы меняется и туда не попадает.
+FEED_KEY = 'feed:{}:{}'
+FEED_LATEST_KEY = 'feed-latest:{}'
+
+
+def _generation_key(scope):
+    return GENERATION_KEY.format(md5(scope.encode()).hexdigest())
+
+
+def generation(*scopes):
+    """Вернуть текущее поколение набора областей кэша.
+
+    Поколение отсутствующей области создаётся случайным, поэтому после
+    сброса или вытеснения ключа старые страницы больше не находятся.
+    """
+    keys = [_generation_key(scope) for scope in scopes]
+    tokens = cache.get_many(keys)
+    for key in keys:
+        if key not in tokens:
+            token = f'{int(time()):x}-{uuid4().hex[:16]}'
+            if not cache.add(key, token, None):
+                token = cache.get(key, token)
+            tokens[key] = token
+    return '.'.join(tokens[key] for key in keys)
+
+
+def generation_time(tokens):
+    """Время смены самого свежего поколения из строки `generation`."""
+    return max(int(token.split('-')[0], 16) for token in tokens.split('.'))
+
+
+def generation_age(tokens):
+    """Сколько секунд назад сменилось самое свежее поколение из строки."""
+    return time() - generation_time(tokens)
+
+
+def bump(*scopes):
+    """Сбросить поколения областей: зависящие от них страницы устаревают."""
+    cache.delete_many([_generation_key(scope) for scope in scopes])
+
+
+class GenerationValidators:
+    """ETag и Last-Modified из поколений областей кэша ответа.
+
+    Поколения сбрасываются при каждой правке, видимой в ответе, поэтому
+    проверка If-None-Match стоит одного обращения к кэшу. В ETag входит
+    пользователь: шапка страницы у каждого своя.
+    """
+
+    def __init__(self, get_scopes):
+        self.get_scopes = get_scopes
+
+    def scopes(self, request, *args, **kwargs):
+        if not hasattr(request, '_generation_scopes'):
+            request._generation_scopes = self.get_scopes(
+                request, *args, **kwargs)
+        return request._generation_scopes
+
+    def tokens(self, request, *args, **kwargs):
+        if not hasattr(request, '_generation_tokens'):
+            scopes = self.scopes(request, *args, **kwargs)
+            request._generation_tokens = scopes and generation(*scopes)
+        return request._generation_tokens
+
+    def etag(self, request, *args, **kwargs):
+        tokens = self.tokens(request, *args, **kwargs)
+        if tokens:
+            user_id = getattr(getattr(request, 'user', None), 'pk', '')
+            raw = f'{tokens}|{user_id}|{request.get_full_path()}'
+            return md5(raw.encode()).hexdigest()
+
+    def last_modified(self, request, *args, **kwargs):
+        tokens = self.tokens(request, *args, **kwargs)
+        if tokens:
+            return datetime.fromtimestamp(
+                generation_time(tokens), timezone.utc)
+
+    def conditional(self, view):
+        """Отвечать 304, если у клиента актуальная версия ответа."""
+        return condition(etag_func=self.etag,
+                         last_modified_func=self.last_modified)(view)
+
+
+def patch_feed_headers(request, response):
+    """Анонимные ленты может хранить общий кэш прокси, остальные — только
+    браузер пользователя, и всегда с проверкой валидатора."""
+    if response.has_header('Expires'):
+        del response['Expires']
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, max_age=0)
+    else:
+        patch_cache_control(response, public=True,
+                            max_age=settings.FEED_MAX_AGE)
+    patch_vary_headers(response, ('Cookie',))
+
+
+def _fresh(entry):
+    """Вероятностное раннее истечение: чем ближе мягкий срок и чем дольше
+    сборка значения, тем вероятнее пересобрать его заранее."""
+    _, soft_expires, delta = entry
+    early = -delta * settings.CACHE_EARLY_BETA * log(1 - random())
+    return time() + early < soft_expires
+
+
+def _rebuild(keys, build, timeout, soft_timeout, cacheable):
+    started = time()
+    value = build()
+    if cacheable(value):
+        entry = (value, time() + soft_timeout, time() - started)
+        cache.set_many(dict.fromkeys(keys, entry), timeout)
+    return value
+
+
+def _wait(key, build):
+    deadline = time() + settings.CACHE_LOCK_WAIT
+    while time() < deadline:
+        sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return build()
+
+
+def single_flight(key, build, timeout, soft_timeout, stale_key=None,
+                  cacheable=lambda value: True):
+    """Значение из кэша, которое пересобирает только один процесс.
+
+    После мягкого срока `soft_timeout` (или чуть раньше, см. `_fresh`)
+    пересборку берёт тот, кто первым захватил ключ блокировки, а
+    остальные до её окончания получают прежнее значение. Если по `key`
+    ничего нет, вместо него отдаётся последнее значение из `stale_key`;
+    без него остальные ждут результат не дольше `CACHE_LOCK_WAIT`.
+    """
+    keys = [key, stale_key] if stale_key else [key]
+    entries = cache.get_many(keys)
+    entry = entries.get(key)
+    if entry is not None and _fresh(entry):
+        return entry[0]
+    lock_key = LOCK_KEY.format(key)
+    if cache.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+        try:
+            return _rebuild(keys, build, timeout, soft_timeout, cacheable)
+        finally:
+            cache.delete(lock_key)
+    stale = entry or entries.get(stale_key)
+    if stale is not None:
+        return stale[0]
+    return _wait(key, build)
+
+
+@contextmanager
+def lock(name):
+    """Блокировка между процессами на ключе общего кэша.
+
+    Ждёт, пока её отпустят; ключ живёт `CACHE_LOCK_TIMEOUT`, поэтому
+    блокировка упавшего процесса задерживает остальных не дольше.
+    """
+    key = LOCK_KEY.format(name)
+    while not cache.add(key, 1, settings.CACHE_LOCK_TIMEOUT):
+        sleep(0.05)
+    try:
+        yield
+    finally:
+        cache.delete(key)
+
+
+def _cacheable(response):
+    return response.status_code == 200 and not response.streaming
+
+
+def _audience(request):
+    """Чья это версия страницы и входит ли в неё CSRF-кука клиента.
+
+    Анонимам отдаётся общая версия, вошедшему пользователю — своя: в ней
+    его шапка и CSRF-токен его сессии.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 'anonymous', False
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    return f'{user.pk}:{csrf}', bool(csrf)
+
+
+def cache_by_generation(get_scopes, timeout):
+    """Кэшировать ответ view, пока не изменится поколение его областей.
+
+    `get_scopes` получает аргументы view и возвращает области кэша
+    или None, если ответ кэшировать не нужно. Версия страницы у анонимов
+    общая, у вошедших пользователей — своя (см. `_audience`). Страница
+    собирается через `single_flight`: пока один процесс строит новую
+    версию, остальные отдают прежнюю, кроме клиентов, которые только что
+    писали сами.
+    Пока поколение моложе окна `REPLICA_STICKY_SECONDS`, страница
+    строится по основной базе, чтобы в кэш не попали данные отстающей
+    реплики. Клиенту с актуальным ETag или Last-Modified отвечает 304
+    без обращения к view.
+    """
+    validators = GenerationValidators(get_scopes)
+
+    def decorator(view):
+        def cached(request, *args, **kwargs):
+            tokens = validators.tokens(request, *args, **kwargs)
+            if tokens is None or request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            scopes = validators.scopes(request, *args, **kwargs)
+            audience, csrf_keyed = _audience(request)
+            page = md5(f'{scopes}|{audience}|{request.get_full_path()}'
+                       .encode()).hexdigest()
+
+            def build():
+                request._cache_status = 'miss'
+                if generation_age(tokens) < settings.REPLICA_STICKY_SECONDS:
+                    with routing.primary():
+                        return view(request, *args, **kwargs)
+                return view(request, *args, **kwargs)
+
+            def cacheable(response):
+                # Страницу с CSRF-токеном можно отдать только той сессии,
+                # чья кука вошла в ключ.
+                return _cacheable(response) and (
+                    csrf_keyed or not request.META.get('CSRF_COOKIE_USED'))
+
+            request._cache_status = 'hit'
+            return single_flight(
+                FEED_KEY.format(tokens, page), build, timeout,
+                settings.FEED_SOFT_TIMEOUT,
+                stale_key=None if routing.is_sticky(request)
+                else FEED_LATEST_KEY.format(page),
+                cacheable=cacheable,
+            )
+
+        conditional = validators.conditional(cached)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                patch_feed_headers(request, response)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,311 @@
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+
+class SqliteCache(BaseCache):
+    """Общий для процессов кэш в отдельном файле SQLite.
+
+    Работает через собственное соединение sqlite3 в режиме WAL, поэтому
+    не занимает соединение Django и не попадает в счётчики SQL-запросов.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = location
+        self.local = threading.local()
+        options = params.get('OPTIONS', {})
+        self.cull_every = int(options.get('CULL_EVERY', 100))
+
+    @property
+    def db(self):
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.location, timeout=5,
+                                 isolation_level=None)
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = NORMAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS cache '
+                '(key TEXT PRIMARY KEY, value BLOB, expires REAL)')
+            self.local.db = db
+        return db
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        rows = self.db.execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) '
+            f'AND (expires IS NULL OR expires > ?)',
+            [*keys, time.time()],
+        ).fetchall()
+        return {keys[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        self.db.executemany(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            [(self._key(key, version),
+              pickle.dumps(value, PICKLE_PROTOCOL), expires)
+             for key, value in data.items()],
+        )
+        self._maybe_cull()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('DELETE FROM cache WHERE key = ? AND expires <= ?',
+                       [key, now])
+            added = db.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)',
+                [key, pickle.dumps(value, PICKLE_PROTOCOL),
+                 self.get_backend_timeout(timeout)],
+            ).rowcount
+        finally:
+            db.execute('COMMIT')
+        return bool(added)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self.db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            [self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()],
+        ).rowcount)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        self.db.executemany(
+            'DELETE FROM cache WHERE key = ?',
+            [(self._key(key, version),) for key in keys])
+
+    def has_key(self, key, version=None):
+        return key in self.get_many([key], version=version)
+
+    def clear(self):
+        self.db.execute('DELETE FROM cache')
+
+    def _maybe_cull(self):
+        if random.randrange(self.cull_every):
+            return
+        db = self.db
+        db.execute('DELETE FROM cache WHERE expires <= ?', [time.time()])
+        extra = db.execute(
+            'SELECT COUNT(*) FROM cache').fetchone()[0] - self._max_entries
+        if extra > 0:
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                [max(extra, self._max_entries // self._cull_frequency)])
+
+
+class RedisCache(BaseCache):
+    """Общий кэш в Redis; нужен установленный пакет `redis`."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured(
+                'Для RedisCache установите пакет redis')
+        self.client = redis.Redis.from_url(location)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _ttl(self, timeout):
+        expires = self.get_backend_timeout(timeout)
+        return None if expires is None else max(int(expires - time.time()), 1)
+
+    def get(self, key, default=None, version=None):
+        value = self.client.get(self._key(key, version))
+        return default if value is None else pickle.loads(value)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = self.client.mget([self._key(key, version) for key in keys])
+        return {key: pickle.loads(value)
+                for key, value in zip(keys, values) if value is not None}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.client.set(self._key(key, version),
+                        pickle.dumps(value, PICKLE_PROTOCOL),
+                        ex=self._ttl(timeout))
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        pipeline = self.client.pipeline()
+        for key, value in data.items():
+            pipeline.set(self._key(key, version),
+                         pickle.dumps(value, PICKLE_PROTOCOL),
+                         ex=self._ttl(timeout))
+        pipeline.execute()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self.client.set(
+            self._key(key, version), pickle.dumps(value, PICKLE_PROTOCOL),
+            ex=self._ttl(timeout), nx=True))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        ttl = self._ttl(timeout)
+        if ttl is None:
+            return bool(self.client.persist(key))
+        return bool(self.client.expire(key, ttl))
+
+    def delete(self, key, version=None):
+        self.client.delete(self._key(key, version))
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def has_key(self, key, version=None):
+        return bool(self.client.exists(self._key(key, version)))
+
+    def clear(self):
+        self.client.flushdb()
+
+
+class TwoTierCache(BaseCache):
+    """Небольшой LRU процесса перед общим кэшем `SHARED`.
+
+    Локально хранятся только ключи с префиксами `LOCAL_PREFIXES`: это
+    страницы и карточки, в ключ которых уже входит поколение или версия,
+    поэтому их содержимое не меняется и копия в процессе не устаревает.
+    Остальные ключи, например поколения, всегда читаются из общего кэша,
+    чтобы сброс из другого процесса был виден сразу.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED', 'shared')
+        self.local_max_entries = int(options.get('LOCAL_MAX_ENTRIES', 500))
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 300)
+        self.local_prefixes = tuple(options.get('LOCAL_PREFIXES', ()))
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _is_local(self, key):
+        return key.startswith(self.local_prefixes)
+
+    def _local_get(self, key, version):
+        with self.lock:
+            entry = self.local.get((key, version))
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self.local[(key, version)]
+                return None
+            self.local.move_to_end((key, version))
+        return pickle.loads(value)
+
+    def _local_set(self, key, value, timeout, version):
+        if not self._is_local(key):
+            return
+        expires = time.time() + self.local_timeout
+        backend_expires = self.get_backend_timeout(timeout)
+        if backend_expires is not None:
+            expires = min(expires, backend_expires)
+        with self.lock:
+            self.local[(key, version)] = (
+                expires, pickle.dumps(value, PICKLE_PROTOCOL))
+            self.local.move_to_end((key, version))
+            while len(self.local) > self.local_max_entries:
+                self.local.popitem(last=False)
+
+    def _local_delete(self, keys, version):
+        with self.lock:
+            for key in keys:
+                self.local.pop((key, version), None)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            value = self._local_get(key, version) if self._is_local(
+                key) else None
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            for key, value in shared.items():
+                self._local_set(key, value, self.local_timeout, version)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        self._local_set(key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        for key, value in data.items():
+            self._local_set(key, value, timeout, version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.add(key, value, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self._local_delete(keys, version)
+        self.shared.delete_many(keys, version)
+
+    def has_key(self, key, version=None):
+        return key in self.get_many([key], version=version)
+
+    def clear(self):
+        with self.lock:
+            self.local.clear()
+        self.shared.clear()
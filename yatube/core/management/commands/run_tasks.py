@@ -0,0 +1,32 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.tasks import DatabaseBackend, get_backend
+
+
+class Command(BaseCommand):
+    help = 'Воркер очереди фоновых задач в базе данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='Задач за один проход')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Пауза при пустой очереди, секунды')
+        parser.add_argument('--once', action='store_true',
+                            help='Разобрать очередь и завершиться')
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if not isinstance(backend, DatabaseBackend):
+            raise CommandError('TASK_BACKEND не использует очередь в базе')
+        total = 0
+        while True:
+            done = backend.work(options['batch_size'])
+            total += done
+            if done:
+                continue
+            if options['once']:
+                break
+            sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {total}'))
@@ -0,0 +1,34 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Скопировать основную SQLite-базу в файлы реплик '
+            'из DATABASE_REPLICAS для локальной проверки маршрутизации')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='Повторять копирование каждые N секунд')
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Копирование реплик поддерживается '
+                               'только для SQLite')
+        while True:
+            source.ensure_connection()
+            for alias in settings.DATABASE_REPLICAS:
+                target = sqlite3.connect(
+                    connections[alias].settings_dict['NAME'])
+                try:
+                    source.connection.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{alias}: синхронизирована')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
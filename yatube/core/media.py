@@ -0,0 +1,78 @@
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CONTENT_ADDRESSED_RE = re.compile(
+    r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Пара (начало, длина) из заголовка Range для файла размера `size`.
+
+    Поддерживается один диапазон; для нескольких и для неразборчивого
+    заголовка возвращает None — тогда отдаётся весь файл. Диапазон
+    за концом файла — RangeNotSatisfiable.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start = max(size - int(last), 0)
+        end = size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end - start + 1
+
+
+class FileRange:
+    """Отрезок открытого файла для FileResponse.
+
+    Читается не дальше `length` байт, а `fileno()` оставляет серверу
+    возможность отдать отрезок через sendfile: позиция файла уже
+    выставлена на начало, длину сервер берёт из Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def offload(path, fullpath, content_type):
+    """Пустой ответ, по которому файл отдаст фронтовый прокси.
+
+    Режим задаёт MEDIA_SENDFILE: 'x-accel-redirect' для nginx (путь
+    под internal-локацией MEDIA_ACCEL_PREFIX) или 'x-sendfile' для
+    Apache mod_xsendfile и lighttpd (абсолютный путь на диске).
+    """
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_SENDFILE == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(path))
+    else:
+        response['X-Sendfile'] = fullpath
+    return response
@@ -0,0 +1,87 @@
+import threading
+from collections import deque
+from time import perf_counter
+
+from django.conf import settings
+
+_local = threading.local()
+_lock = threading.Lock()
+_history = {}
+
+
+class RequestMetrics:
+    """Счётчики одного запроса: SQL, шаблоны и кэш."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += perf_counter() - start
+
+    def server_timing(self, total):
+        timings = [
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        if self.cache:
+            timings.append(f'cache;desc={self.cache}')
+        return ', '.join(timings)
+
+
+def start():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def stop():
+    _local.metrics = None
+
+
+def current():
+    return getattr(_local, 'metrics', None)
+
+
+def record(view_name, total, metrics):
+    """Добавить запрос в скользящую историю view."""
+    with _lock:
+        history = _history.get(view_name)
+        if history is None:
+            history = deque(maxlen=settings.METRICS_HISTORY)
+            _history[view_name] = history
+        history.append((total, metrics.queries, metrics.sql_time))
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def snapshot():
+    """Перцентили времени и среднее число запросов по каждому view."""
+    with _lock:
+        history = {name: list(rows) for name, rows in _history.items()}
+    stats = {}
+    for name, rows in history.items():
+        durations = sorted(row[0] for row in rows)
+        stats[name] = {
+            'count': len(rows),
+            'p50': _percentile(durations, 0.50),
+            'p95': _percentile(durations, 0.95),
+            'p99': _percentile(durations, 0.99),
+            'queries': sum(row[1] for row in rows) / len(rows),
+            'sql_time': sum(row[2] for row in rows) / len(rows),
+        }
+    return stats
+
+
+def reset():
+    with _lock:
+        _history.clear()
@@ -0,0 +1,74 @@
+import logging
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics, routing
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def cache_status(request):
+    return getattr(request, '_cache_status', None)
+
+
+class MetricsMiddleware:
+    """Число запросов и время SQL, шаблонов и кэша для каждого view.
+
+    Итоги отдаются заголовком Server-Timing и копятся в скользящей
+    истории по имени URL; превышение `QUERY_BUDGETS` пишется в лог или,
+    при `QUERY_BUDGET_RAISE`, прерывает запрос исключением.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.start()
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(request_metrics))
+                response = self.get_response(request)
+        finally:
+            metrics.stop()
+        total = perf_counter() - started
+        request_metrics.cache = cache_status(request)
+        response['Server-Timing'] = request_metrics.server_timing(total)
+        match = request.resolver_match
+        if match is not None:
+            metrics.record(match.view_name, total, request_metrics)
+            self.check_budget(match.view_name, request_metrics)
+        return response
+
+    def check_budget(self, view_name, request_metrics):
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is None or request_metrics.queries <= budget:
+            return
+        message = (f'{view_name}: {request_metrics.queries} SQL-запросов '
+                   f'при бюджете {budget}')
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ReplicaStickinessMiddleware:
+    """После успешной записи читать данные пользователя из основной базы."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (request.method not in routing.SAFE_METHODS
+                and response.status_code < 400):
+            routing.stick_to_primary(response)
+        return response
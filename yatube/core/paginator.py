@@ -0,0 +1,78 @@
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+CURSOR_SEPARATOR = '|'
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (поле, pk) без COUNT(*) и OFFSET.
+
+    Страница выбирается непрозрачным курсором `after` или `before`,
+    поэтому стоимость запроса не зависит от глубины страницы.
+    """
+
+    def __init__(self, object_list, per_page, key='pub_date'):
+        self.key = key
+        self.field = object_list.model._meta.get_field(key)
+        super().__init__(object_list.order_by(f'-{key}', '-pk'), per_page)
+        self._num_pages = 1
+
+    @property
+    def num_pages(self):
+        return self._num_pages
+
+    def encode_cursor(self, obj):
+        value = self.field.value_to_string(obj)
+        raw = f'{value}{CURSOR_SEPARATOR}{obj.pk}'
+        return urlsafe_base64_encode(raw.encode())
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            raw = urlsafe_base64_decode(cursor).decode()
+            value, pk = raw.rsplit(CURSOR_SEPARATOR, 1)
+            return self.field.to_python(value), int(pk)
+        except (ValueError, ValidationError):
+            return None
+
+    def page(self, after=None, before=None):
+        """Вернуть страницу после курсора `after` или перед `before`."""
+        before_cursor = self.decode_cursor(before)
+        cursor = before_cursor or self.decode_cursor(after)
+        backwards = before_cursor is not None
+        queryset = self.object_list
+        if cursor is not None:
+            value, pk = cursor
+            lookup = 'gt' if backwards else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'{self.key}__{lookup}': value})
+                | Q(**{self.key: value, f'pk__{lookup}': pk})
+            )
+        if backwards:
+            queryset = queryset.reverse()
+        items = list(queryset[:self.per_page + 1])
+        has_more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if backwards:
+            if not has_more:
+                return self.page()
+            items.reverse()
+            has_previous, has_next = True, True
+        else:
+            has_previous, has_next = cursor is not None, has_more
+        number = 2 if has_previous else 1
+        self._num_pages = number + 1 if has_next else number
+        page = self._get_page(items, number, self)
+        page.previous_cursor = (
+            self.encode_cursor(items[0]) if has_previous and items else None
+        )
+        page.next_cursor = (
+            self.encode_cursor(items[-1]) if has_next and items else None
+        )
+        return page
+
+    def get_page(self, after=None, before=None):
+        return self.page(after=after, before=before)
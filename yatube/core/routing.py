@@ -0,0 +1,78 @@
+import random
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from time import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+STICKY_COOKIE = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_local = threading.local()
+
+
+def current_replica():
+    return getattr(_local, 'replica', None)
+
+
+@contextmanager
+def use_database(alias):
+    """Читать внутри блока из базы `alias`; None — из основной."""
+    previous = current_replica()
+    _local.replica = alias
+    try:
+        yield
+    finally:
+        _local.replica = previous
+
+
+def primary():
+    return use_database(None)
+
+
+def is_sticky(request):
+    """Пользователь недавно писал и должен видеть свои изменения."""
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time()
+    except ValueError:
+        return False
+
+
+def stick_to_primary(response):
+    """Направлять чтения пользователя в основную базу, пока реплики
+    догоняют его запись."""
+    seconds = settings.REPLICA_STICKY_SECONDS
+    response.set_cookie(STICKY_COOKIE, f'{time() + seconds:.0f}',
+                        max_age=seconds, httponly=True, samesite='Lax')
+
+
+def read_from_replica(view):
+    """Отдавать чтения GET-view реплике, если пользователь недавно не писал.
+
+    Реплика выбирается одна на весь запрос, чтобы страница не собиралась
+    из данных разной свежести.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or request.method not in SAFE_METHODS
+                or is_sticky(request)):
+            return view(request, *args, **kwargs)
+        with use_database(random.choice(replicas)):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Чтения — на реплику текущего запроса, записи — в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        return current_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,64 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.xml',
+                '.map', '.ico', '.ttf', '.eot')
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хэшем содержимого в имени и сжатыми копиями рядом.
+
+    Для текстовых файлов `collectstatic` пишет `.gz`, а при установленном
+    пакете `brotli` и `.br`, если копия получилась меньше оригинала.
+    Отдаёт их `core.views.static_serve`.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name, hashed_name in self.hashed_files.items():
+            self.compress(name)
+            self.compress(hashed_name)
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE) or not self.exists(name):
+            return
+        with self.open(name) as original:
+            data = original.read()
+        for extension, compress in _compressors():
+            compressed = compress(data)
+            if len(compressed) >= len(data):
+                continue
+            if self.exists(name + extension):
+                self.delete(name + extension)
+            self._save(name + extension, ContentFile(compressed))
+
+
+def compressed_variant(path, accept_encoding):
+    """Путь к сжатой копии файла, которую принимает клиент, и её кодировка.
+
+    Без подходящей копии возвращает исходный путь и None.
+    """
+    accepted = {
+        part.split(';')[0].strip()
+        for part in accept_encoding.lower().split(',')
+    }
+    for extension, encoding in (('.br', 'br'), ('.gz', 'gzip')):
+        if encoding in accepted and os.path.exists(path + extension):
+            return path + extension, encoding
+    return path, None
@@ -0,0 +1,191 @@
+import json
+import logging
+import threading
+import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from time import sleep
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+_registry = {}
+
+
+class BackgroundTask:
+    """Зарегистрированная фоновая задача.
+
+    Функция задачи с `batch=True` получает список аргументов всех
+    вызовов, выбранных воркером за один проход, и должна быть
+    идемпотентной: при ошибке пачка повторяется целиком.
+    """
+
+    def __init__(self, func, batch=False, max_attempts=None):
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.batch = batch
+        self.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def delay(self, *args):
+        """Поставить вызов в очередь настроенного бэкенда."""
+        get_backend().enqueue(self.name, list(args))
+
+    def run(self, calls):
+        if self.batch:
+            self.func(calls)
+        else:
+            for args in calls:
+                self.func(*args)
+
+
+def task(func=None, *, batch=False, max_attempts=None):
+    def register(func):
+        registered = BackgroundTask(func, batch, max_attempts)
+        _registry[registered.name] = registered
+        return registered
+    return register(func) if func else register
+
+
+def retry_delay(attempts):
+    return settings.TASK_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+class ImmediateBackend:
+    """Выполнять задачи сразу в текущем потоке."""
+
+    def enqueue(self, name, args):
+        _registry[name].run([args])
+
+
+class ThreadBackend:
+    """Пул потоков текущего процесса, задачи стартуют после коммита."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.TASK_WORKERS, thread_name_prefix='tasks')
+
+    def enqueue(self, name, args):
+        transaction.on_commit(
+            lambda: self.executor.submit(self.execute, name, args))
+
+    def execute(self, name, args):
+        registered = _registry[name]
+        try:
+            for attempt in range(1, registered.max_attempts + 1):
+                try:
+                    registered.run([args])
+                    return
+                except Exception:
+                    logger.exception('Задача %s, попытка %s', name, attempt)
+                    sleep(retry_delay(attempt))
+        finally:
+            connection.close()
+
+
+class DatabaseBackend:
+    """Очередь в таблице базы данных, её разбирает `manage.py run_tasks`.
+
+    Вызовы внутри транзакции копятся и записываются одним INSERT после
+    коммита; при откате транзакции пропадают вместе с ней.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def enqueue(self, name, args):
+        if not connection.in_atomic_block:
+            Task.objects.create(name=name, args=json.dumps(args))
+            return
+        if not any(callback == self.flush
+                   for _, callback in connection.run_on_commit):
+            self.local.pending = []
+            transaction.on_commit(self.flush)
+        self.local.pending.append((name, args))
+
+    def flush(self):
+        pending, self.local.pending = self.local.pending, []
+        Task.objects.bulk_create(
+            Task(name=name, args=json.dumps(args))
+            for name, args in pending
+        )
+
+    def claim(self, limit):
+        """Забрать до `limit` готовых задач под аренду этого воркера."""
+        now = timezone.now()
+        due = Task.objects.filter(failed=False, run_at__lte=now).filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+        ids = list(due.order_by('run_at', 'pk').values_list(
+            'pk', flat=True)[:limit])
+        token = uuid4().hex
+        due.filter(pk__in=ids).update(
+            locked_by=token,
+            locked_until=now + timedelta(seconds=settings.TASK_LEASE),
+        )
+        return list(Task.objects.filter(locked_by=token))
+
+    def work(self, limit=None):
+        """Выполнить одну пачку задач и вернуть их число."""
+        claimed = self.claim(limit or settings.TASK_BATCH_SIZE)
+        groups = defaultdict(list)
+        for queued in claimed:
+            groups[queued.name].append(queued)
+        for name, queued in groups.items():
+            error = self._run(name, queued)
+            if error is None:
+                continue
+            if len(queued) == 1:
+                self.retry(name, queued, error)
+                continue
+            # Пачка упала целиком: вызовы повторяются по одному, чтобы
+            # на повтор ушли только сломанные. Задачи идемпотентны,
+            # поэтому уже выполненная часть пачки не мешает.
+            for item in queued:
+                error = self._run(name, [item])
+                if error is not None:
+                    self.retry(name, [item], error)
+        return len(claimed)
+
+    def _run(self, name, queued):
+        """Выполнить вызовы одной задачи; при ошибке вернуть её текст."""
+        try:
+            _registry[name].run([json.loads(item.args) for item in queued])
+        except Exception:
+            logger.exception('Задача %s не выполнена', name)
+            return traceback.format_exc()
+        Task.objects.filter(pk__in=[item.pk for item in queued]).delete()
+        return None
+
+    def retry(self, name, queued, error):
+        registered = _registry.get(name)
+        max_attempts = registered.max_attempts if registered else 0
+        for item in queued:
+            item.attempts += 1
+            item.error = error
+            item.locked_by = ''
+            item.locked_until = None
+            item.failed = item.attempts >= max_attempts
+            item.run_at = timezone.now() + timedelta(
+                seconds=retry_delay(item.attempts))
+            item.save()
+
+
+_backends = {}
+
+
+def get_backend():
+    """Бэкенд очереди из настройки `TASK_BACKEND`."""
+    path = settings.TASK_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
@@ -0,0 +1,70 @@
+from time import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import LOCK_KEY, single_flight
+
+
+class Builder:
+    def __init__(self, value='новое'):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+@override_settings(CACHE_LOCK_WAIT=0)
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.build = Builder()
+
+    def get(self, **kwargs):
+        return single_flight('key', self.build, 60, 30, **kwargs)
+
+    def test_fresh_value_is_not_rebuilt(self):
+        self.assertEqual(self.get(), 'новое')
+        self.build.value = 'другое'
+        self.assertEqual(self.get(), 'новое')
+        self.assertEqual(self.build.calls, 1)
+
+    def test_soft_expired_value_is_rebuilt(self):
+        cache.set('key', ('старое', time() - 1, 0.1))
+        self.assertEqual(self.get(), 'новое')
+        self.assertEqual(cache.get('key')[0], 'новое')
+
+    def test_stale_value_served_while_other_rebuilds(self):
+        cache.set('key', ('старое', time() - 1, 0.1))
+        cache.add(LOCK_KEY.format('key'), 1)
+        self.assertEqual(self.get(), 'старое')
+        cache.delete('key')
+        cache.set('latest', ('последнее', time() - 1, 0.1))
+        self.assertEqual(self.get(stale_key='latest'), 'последнее')
+        self.assertEqual(self.build.calls, 0)
+
+    def test_builds_without_stale_value_after_wait(self):
+        cache.add(LOCK_KEY.format('key'), 1)
+        self.assertEqual(self.get(), 'новое')
+        self.assertIsNone(cache.get('key'))
+
+    def test_stale_key_updated_with_value(self):
+        self.get(stale_key='latest')
+        self.assertEqual(cache.get('latest')[0], 'новое')
+        self.assertIsNone(cache.get(LOCK_KEY.format('key')))
+
+    @override_settings(CACHE_EARLY_BETA=1.0)
+    def test_slow_value_expires_early(self):
+        cache.set('key', ('старое', time() + 5, 10))
+        with mock.patch('core.cache.random', return_value=0.5):
+            self.assertEqual(self.get(), 'новое')
+        cache.set('key', ('старое', time() + 5, 0.01))
+        with mock.patch('core.cache.random', return_value=0.5):
+            self.assertEqual(self.get(), 'старое')
+
+    def test_uncacheable_value_not_stored(self):
+        self.get(cacheable=lambda value: False)
+        self.assertIsNone(cache.get('key'))
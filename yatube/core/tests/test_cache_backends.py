@@ -0,0 +1,113 @@
+import os
+import tempfile
+import time
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..cache_backends import SqliteCache, TwoTierCache
+
+
+def two_tier(max_entries=500):
+    return TwoTierCache('', {'OPTIONS': {
+        'SHARED': 'shared',
+        'LOCAL_MAX_ENTRIES': max_entries,
+        'LOCAL_PREFIXES': ('page:',),
+    }})
+
+
+class SqliteCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = SqliteCache(self.location, {})
+
+    def test_visible_to_other_process(self):
+        """Второй экземпляр на том же файле видит записи первого."""
+        other = SqliteCache(self.location, {})
+        self.cache.set_many({'a': 1, 'b': [2]})
+        self.assertEqual(other.get_many(['a', 'b', 'c']), {'a': 1, 'b': [2]})
+        other.delete('a')
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('a', 'нет'), 'нет')
+
+    def test_add_and_expiry(self):
+        self.assertTrue(self.cache.add('key', 1))
+        self.assertFalse(self.cache.add('key', 2))
+        self.assertEqual(self.cache.get('key'), 1)
+        self.cache.set('short', 1, 0.01)
+        time.sleep(0.02)
+        self.assertFalse(self.cache.has_key('short'))
+        self.assertTrue(self.cache.add('short', 2))
+        self.assertEqual(self.cache.get('short'), 2)
+
+    def test_touch_and_clear(self):
+        self.cache.set('key', 1, 60)
+        self.assertTrue(self.cache.touch('key', None))
+        self.assertFalse(self.cache.touch('missing', None))
+        expires, = self.cache.db.execute(
+            'SELECT expires FROM cache').fetchone()
+        self.assertIsNone(expires)
+        self.assertEqual(self.cache.get('key'), 1)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('key'))
+
+
+class TwoTierCacheTest(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(CACHES={'shared': {
+            'BACKEND': 'core.cache_backends.SqliteCache',
+            'LOCATION': os.path.join(directory.name, 'cache.sqlite3'),
+        }})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.shared = caches['shared']
+
+    def test_hot_keys_served_from_process(self):
+        cache = two_tier()
+        cache.set_many({'page:index': 'страница', 'generation:index': 't1'})
+        self.shared.clear()
+        self.assertEqual(cache.get('page:index'), 'страница')
+        self.assertIsNone(cache.get('generation:index'))
+
+    def test_other_process_sees_shared_tier(self):
+        """Изменения неотмеченных ключей из другого процесса видны сразу."""
+        first, second = two_tier(), two_tier()
+        first.set('generation:index', 't1')
+        second.get('generation:index')
+        first.delete('generation:index')
+        self.assertIsNone(second.get('generation:index'))
+        first.set('page:index', 'страница')
+        self.assertEqual(second.get('page:index'), 'страница')
+
+    def test_local_tier_is_lru(self):
+        cache = two_tier(max_entries=2)
+        cache.set_many({'page:1': 1, 'page:2': 2})
+        cache.get('page:1')
+        cache.set('page:3', 3)
+        self.shared.clear()
+        self.assertEqual(cache.get_many(['page:1', 'page:2', 'page:3']),
+                         {'page:1': 1, 'page:3': 3})
+
+    def test_local_copy_is_not_shared_object(self):
+        cache = two_tier()
+        cache.set('page:list', [1])
+        cache.get('page:list').append(2)
+        self.assertEqual(cache.get('page:list'), [1])
+
+
+class LocalPrefixesTest(TestCase):
+    def test_feed_pages_and_cards_kept_in_process(self):
+        """Ключи страниц и карточек совпадают с LOCAL_PREFIXES."""
+        cache.clear()
+        Post.objects.create(
+            author=User.objects.create_user(username='author'), text='Пост')
+        self.client.get(reverse('posts:index'))
+        prefixes = {key.split(':')[0] for key, _ in cache.local}
+        self.assertEqual(prefixes, {'feed', 'card'})
@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.http import http_date
+
+from posts.benchmark import media_throughput
+
+from ..media import RangeNotSatisfiable, parse_range
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+DATA = bytes(range(256)) * 40
+DIGEST = 'ab' * 32
+ADDRESSED = f'posts/ab/ab/{DIGEST}.jpg'
+
+
+class ParseRangeTest(SimpleTestCase):
+    def test_ranges(self):
+        cases = (
+            ('bytes=0-99', (0, 100)),
+            ('bytes=100-', (100, 900)),
+            ('bytes=-100', (900, 100)),
+            ('bytes=900-5000', (900, 100)),
+            ('bytes=-5000', (0, 1000)),
+            ('bytes=0-1,5-6', None),
+            ('items=0-1', None),
+            ('bytes=-', None),
+        )
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, 1000), expected)
+
+    def test_unsatisfiable(self):
+        for header in ('bytes=1000-', 'bytes=10-5'):
+            with self.subTest(header=header):
+                with self.assertRaises(RangeNotSatisfiable):
+                    parse_range(header, 1000)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaServeTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in ('cache/photo.jpg', ADDRESSED):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(DATA)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def get(self, name=ADDRESSED, **headers):
+        return self.client.get(f'{settings.MEDIA_URL}{name}', **headers)
+
+    def test_whole_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), DATA)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(DATA)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range(self):
+        response = self.get(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'],
+                         f'bytes 100-199/{len(DATA)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join(response.streaming_content),
+                         DATA[100:200])
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE=f'bytes={len(DATA)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(DATA)}')
+
+    def test_stale_if_range_returns_whole_file(self):
+        response = self.get(HTTP_RANGE='bytes=0-9',
+                            HTTP_IF_RANGE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), DATA)
+
+    def test_not_modified(self):
+        last_modified = self.get()['Last-Modified']
+        response = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_cache_control(self):
+        self.assertEqual(self.get()['Cache-Control'],
+                         'public, max-age=31536000, immutable')
+        self.assertEqual(self.get('cache/photo.jpg')['Cache-Control'],
+                         f'public, max-age={settings.MEDIA_MAX_AGE}')
+
+    def test_missing_and_outside_files(self):
+        for name in ('posts/missing.jpg', '../manage.py', 'cache'):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name).status_code, 404)
+
+    def test_offload_to_proxy(self):
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.get(HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'],
+                         f'{settings.MEDIA_ACCEL_PREFIX}{ADDRESSED}')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        with self.settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.get()
+        self.assertEqual(response['X-Sendfile'],
+                         os.path.join(TEMP_MEDIA_ROOT, ADDRESSED))
+
+    def test_benchmark_compares_with_static_serve(self):
+        report = media_throughput(file_mb=1, repeat=1)
+        self.assertEqual(set(report),
+                         {'static_serve', 'media_serve', 'range', 'offload'})
+        self.assertEqual(report['media_serve']['body_mb'], 1)
+        self.assertEqual(report['offload']['body_mb'], 0)
@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import metrics
+from ..middleware import QueryBudgetExceeded
+
+
+class MetricsMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+        metrics.reset()
+
+    def test_server_timing_header(self):
+        """Ответ содержит Server-Timing с SQL, шаблонами и кэшем."""
+        response = self.guest_client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        self.assertIn('db;dur=', timing)
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('cache;desc=miss', timing)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertIn('cache;desc=hit', response['Server-Timing'])
+
+    def test_history_per_url_name(self):
+        """Запросы копятся в истории по имени URL."""
+        for _ in range(3):
+            self.guest_client.get(reverse('posts:index'))
+        stats = metrics.snapshot()['posts:index']
+        self.assertEqual(stats['count'], 3)
+        self.assertLessEqual(stats['p50'], stats['p99'])
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0},
+                       QUERY_BUDGET_RAISE=True)
+    def test_budget_exceeded_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.guest_client.get(reverse('posts:index'))
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 0},
+                       QUERY_BUDGET_RAISE=False)
+    def test_budget_exceeded_logs_warning(self):
+        with self.assertLogs('core.middleware', 'WARNING'):
+            self.guest_client.get(reverse('posts:index'))
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import routing
+from ..cache import cache_by_generation
+
+
+def view(request):
+    return HttpResponse(routing.ReplicaRouter().db_for_read(Post) or '')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def test_get_reads_from_replica(self):
+        response = routing.read_from_replica(view)(self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertIsNone(routing.current_replica())
+
+    def test_writes_and_sticky_users_read_primary(self):
+        wrapped = routing.read_from_replica(view)
+        self.assertEqual(wrapped(self.factory.post('/')).content, b'')
+        request = self.factory.get('/')
+        request.COOKIES[routing.STICKY_COOKIE] = '9999999999'
+        self.assertEqual(wrapped(request).content, b'')
+        request.COOKIES[routing.STICKY_COOKIE] = '1'
+        self.assertEqual(wrapped(request).content, b'replica')
+
+    def test_write_sets_sticky_cookie(self):
+        client = Client()
+        client.force_login(self.user)
+        response = client.post(reverse('posts:post_create'),
+                               {'text': 'Новый пост'})
+        self.assertEqual(response.status_code, 302)
+        request = self.factory.get('/')
+        request.COOKIES[routing.STICKY_COOKIE] = response.cookies[
+            routing.STICKY_COOKIE].value
+        self.assertTrue(routing.is_sticky(request))
+
+    def test_fresh_generation_is_built_from_primary(self):
+        cached = routing.read_from_replica(
+            cache_by_generation(lambda request: ('scope',), 60)(view))
+        request = self.factory.get('/')
+        request.user = AnonymousUser()
+        self.assertEqual(cached(request).content, b'')
+        request = self.factory.get('/other/')
+        request.user = AnonymousUser()
+        with self.settings(REPLICA_STICKY_SECONDS=0):
+            response = cached(request)
+        self.assertEqual(response.content, b'replica')
@@ -0,0 +1,76 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+SOURCE = tempfile.mkdtemp(dir=settings.BASE_DIR)
+STATIC_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CSS = 'body { background: url("../img/logo.png"); }\n' + (
+    '.card { margin: 0 auto; padding: 1rem; }\n' * 50)
+
+
+@override_settings(
+    STATICFILES_DIRS=[SOURCE],
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE=(
+        'core.staticfiles.CompressedManifestStaticFilesStorage'),
+)
+class CompressedManifestStaticFilesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE, 'css'))
+        os.makedirs(os.path.join(SOURCE, 'img'))
+        for name in ('site.css', 'bootstrap.min.css'):
+            with open(os.path.join(SOURCE, 'css', name), 'w') as css:
+                css.write(CSS)
+        with open(os.path.join(SOURCE, 'img', 'logo.png'), 'wb') as logo:
+            logo.write(b'\x89PNG\r\n\x1a\n' + bytes(64))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SOURCE, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(STATIC_ROOT, 'staticfiles.json')) as manifest:
+            self.paths = json.load(manifest)['paths']
+
+    def test_hashed_names_and_compressed_copies(self):
+        css = self.paths['css/site.css']
+        self.assertRegex(css, r'^css/site\.[0-9a-f]{12}\.css$')
+        with gzip.open(os.path.join(STATIC_ROOT, css + '.gz')) as copy:
+            self.assertIn(self.paths['img/logo.png'], copy.read().decode())
+        self.assertTrue(os.path.exists(
+            os.path.join(STATIC_ROOT, 'css/site.css.gz')))
+        self.assertFalse(os.path.exists(
+            os.path.join(STATIC_ROOT, self.paths['img/logo.png'] + '.gz')))
+
+    def test_serves_compressed_variant_with_immutable_cache(self):
+        url = f'{settings.STATIC_URL}{self.paths["css/site.css"]}'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)),
+                         b''.join(self.client.get(url).streaming_content))
+
+    def test_unhashed_name_gets_short_cache(self):
+        response = self.client.get(f'{settings.STATIC_URL}css/site.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Cache-Control'],
+                         f'public, max-age={settings.STATIC_MAX_AGE}')
+
+    def test_missing_and_outside_files(self):
+        for path in ('css/missing.css', '../manage.py'):
+            with self.subTest(path=path):
+                response = self.client.get(f'{settings.STATIC_URL}{path}')
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .. import tasks
+from ..models import Task
+
+calls = []
+
+
+@tasks.task
+def remember(value):
+    calls.append(value)
+
+
+@tasks.task(batch=True)
+def remember_batch(batch):
+    calls.append(batch)
+
+
+@tasks.task(batch=True)
+def remember_valid(batch):
+    if any(value < 0 for value, in batch):
+        raise ValueError('Отрицательное значение')
+    calls.extend(value for value, in batch)
+
+
+@tasks.task(max_attempts=2)
+def explode():
+    raise ValueError('Ошибка задачи')
+
+
+@override_settings(TASK_BACKEND='core.tasks.DatabaseBackend',
+                   TASK_RETRY_DELAY=0)
+class DatabaseBackendTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.backend = tasks.get_backend()
+
+    def test_transaction_is_flushed_with_one_insert(self):
+        remember.delay(1)
+        remember.delay(2)
+        self.assertFalse(Task.objects.exists())
+        with self.assertNumQueries(1):
+            self.backend.flush()
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_worker_runs_and_deletes_tasks(self):
+        for value in range(3):
+            remember.delay(value)
+        remember_batch.delay('a')
+        remember_batch.delay('b')
+        self.backend.flush()
+        call_command('run_tasks', once=True, stdout=StringIO())
+        self.assertEqual(calls, [0, 1, 2, [['a'], ['b']]])
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_is_retried_then_marked_failed(self):
+        explode.delay()
+        self.backend.flush()
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.backend.work()
+        queued = Task.objects.get()
+        self.assertEqual(queued.attempts, 1)
+        self.assertFalse(queued.failed)
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.backend.work()
+        queued.refresh_from_db()
+        self.assertTrue(queued.failed)
+        self.assertIn('Ошибка задачи', queued.error)
+        self.assertEqual(self.backend.work(), 0)
+
+    def test_failed_batch_is_retried_call_by_call(self):
+        """Из упавшей пачки на повтор уходит только сломанный вызов."""
+        for value in (1, -1, 2):
+            remember_valid.delay(value)
+        self.backend.flush()
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.backend.work()
+        self.assertEqual(calls, [1, 2])
+        queued = Task.objects.get()
+        self.assertEqual(queued.args, '[-1]')
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn('Отрицательное значение', queued.error)
+
+    def test_claimed_tasks_are_leased(self):
+        remember.delay(1)
+        self.backend.flush()
+        self.assertEqual(len(self.backend.claim(10)), 1)
+        self.assertEqual(self.backend.claim(10), [])
@@ -1,4 +1,24 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (FileResponse, Http404, HttpResponse,
+                         HttpResponseNotModified)
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .media import (CONTENT_ADDRESSED_RE, FileRange, RangeNotSatisfiable,
+                    offload, parse_range)
+from .staticfiles import compressed_variant
+
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+MEDIA_BLOCK_SIZE = 64 * 1024
 
 
 def page_not_found(request, exception):
@@ -15,3 +35,91 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def _file_or_404(root, path):
+    try:
+        fullpath = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+    return fullpath, os.stat(fullpath)
+
+
+def static_serve(request, path):
+    """Файл из STATIC_ROOT: сжатая копия по Accept-Encoding и вечный кэш
+    для имён с хэшем содержимого."""
+    fullpath, stat = _file_or_404(settings.STATIC_ROOT, path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        return HttpResponseNotModified()
+    served, encoding = compressed_variant(
+        fullpath, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    content_type, _ = mimetypes.guess_type(fullpath)
+    response = FileResponse(
+        open(served, 'rb'),
+        content_type=content_type or 'application/octet-stream')
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if HASHED_NAME_RE.search(path):
+        response['Cache-Control'] = IMMUTABLE
+    else:
+        response['Cache-Control'] = (
+            f'public, max-age={settings.STATIC_MAX_AGE}')
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def media_serve(request, path):
+    """Файл из MEDIA_ROOT с поддержкой Range и If-Modified-Since.
+
+    Файл отдаётся потоком через FileResponse, так что WSGI-сервер с
+    `wsgi.file_wrapper` шлёт его через sendfile. При MEDIA_SENDFILE
+    отдачу берёт на себя фронтовый прокси.
+    """
+    fullpath, stat = _file_or_404(settings.MEDIA_ROOT, path)
+    last_modified = http_date(stat.st_mtime)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                              stat.st_mtime, stat.st_size):
+        return HttpResponseNotModified()
+    content_type, _ = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    if settings.MEDIA_SENDFILE:
+        response = offload(path, fullpath, content_type)
+    else:
+        response = _file_response(request, fullpath, stat, content_type,
+                                  last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = last_modified
+    if CONTENT_ADDRESSED_RE.match(path):
+        response['Cache-Control'] = IMMUTABLE
+    else:
+        response['Cache-Control'] = f'public, max-age={settings.MEDIA_MAX_AGE}'
+    return response
+
+
+def _file_response(request, fullpath, stat, content_type, last_modified):
+    header = request.META.get('HTTP_RANGE', '')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != last_modified:
+        header = ''
+    try:
+        byte_range = parse_range(header, stat.st_size) if header else None
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    file = open(fullpath, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, length = byte_range
+        response = FileResponse(FileRange(file, start, length),
+                                content_type=content_type, status=206)
+        response['Content-Length'] = length
+        response['Content-Range'] = (
+            f'bytes {start}-{start + length - 1}/{stat.st_size}')
+    response.block_size = MEDIA_BLOCK_SIZE
+    return response
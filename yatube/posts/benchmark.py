@@ -0,0 +1,301 @@
+import os
+import re
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+from time import perf_counter
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+from django.views.static import serve
+from PIL import Image
+
+from core.views import media_serve
+
+from . import images
+from .models import Follow, Group, Post
+from .seeding import SEED_PASSWORD
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+Sample = namedtuple('Sample', 'latency queries status')
+
+IMAGE_SIZES = ((1280, 960), (4032, 3024), (6000, 4000))
+MEDIA_FILE_MB = 16
+
+
+SCENARIOS = (
+    'index',
+    'group_posts',
+    'profile',
+    'post_detail',
+    'follow_index',
+    'add_comment',
+)
+
+
+def _targets():
+    """Адреса сценариев на последних объектах базы."""
+    post = Post.objects.select_related('author').order_by('-pk').first()
+    group = Group.objects.order_by('-pk').first()
+    follow = Follow.objects.select_related('user').order_by('-pk').first()
+    reader = follow.user if follow else None
+    targets = {'index': ('get', reverse('posts:index'), None)}
+    if group is not None:
+        targets['group_posts'] = (
+            'get', reverse('posts:group_list', args=[group.slug]), None)
+    if post is not None:
+        targets['profile'] = (
+            'get', reverse('posts:profile', args=[post.author.username]),
+            None)
+        targets['post_detail'] = (
+            'get', reverse('posts:post_detail', args=[post.pk]), None)
+    if reader is not None:
+        targets['follow_index'] = (
+            'get', reverse('posts:follow_index'), reader)
+    if post is not None and reader is not None:
+        targets['add_comment'] = (
+            'post', reverse('posts:add_comment', args=[post.pk]), reader)
+    return targets
+
+
+def _queries(headers):
+    match = QUERIES_RE.search(headers.get('Server-Timing', ''))
+    return int(match.group(1)) if match else None
+
+
+def _client_worker(method, url, user, count, cold):
+    """Запросы через тестовый клиент Django в текущем процессе."""
+    client = Client()
+    if user is not None:
+        client.force_login(user)
+    samples = []
+    try:
+        for i in range(count):
+            if cold:
+                cache.clear()
+            data = {'text': f'Комментарий {i}'} if method == 'post' else None
+            started = perf_counter()
+            response = getattr(client, method)(url, data)
+            samples.append(Sample(
+                perf_counter() - started,
+                _queries(response),
+                response.status_code,
+            ))
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+    return samples
+
+
+def _http_worker(base_url, method, url, user, count, cold):
+    """Запросы по HTTP к запущенному WSGI-серверу."""
+    session = requests.Session()
+    if user is not None:
+        login_url = base_url + reverse('users:login')
+        session.get(login_url)
+        session.post(login_url, {
+            'username': user.username,
+            'password': SEED_PASSWORD,
+            'csrfmiddlewaretoken': session.cookies.get('csrftoken'),
+        })
+    samples = []
+    for i in range(count):
+        data = None
+        if method == 'post':
+            data = {
+                'text': f'Комментарий {i}',
+                'csrfmiddlewaretoken': session.cookies.get('csrftoken'),
+            }
+        started = perf_counter()
+        response = session.request(
+            method, base_url + url, data=data, allow_redirects=False)
+        samples.append(Sample(
+            perf_counter() - started,
+            _queries(response.headers),
+            response.status_code,
+        ))
+    return samples
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(samples, elapsed):
+    """p50/p95/p99 в миллисекундах, запросы к БД и запросы в секунду."""
+    latencies = sorted(sample.latency * 1000 for sample in samples)
+    queries = [sample.queries for sample in samples
+               if sample.queries is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(sample.status >= 500 for sample in samples),
+        'p50': _percentile(latencies, 0.50),
+        'p95': _percentile(latencies, 0.95),
+        'p99': _percentile(latencies, 0.99),
+        'queries': sum(queries) / len(queries) if queries else None,
+        'rps': len(samples) / elapsed if elapsed else None,
+    }
+
+
+def run(scenarios=SCENARIOS, requests_count=100, concurrency=1,
+        cold=False, base_url=None):
+    """Прогнать сценарии с заданной параллельностью и вернуть отчёт.
+
+    Без `base_url` запросы идут через тестовый клиент в этом процессе,
+    иначе — по HTTP к серверу по этому адресу.
+    """
+    targets = _targets()
+    report = {}
+    for name in scenarios:
+        if name not in targets:
+            continue
+        method, url, user = targets[name]
+        if base_url:
+            worker = partial(_http_worker, base_url.rstrip('/'))
+        else:
+            worker = _client_worker
+        shares = [requests_count // concurrency] * concurrency
+        shares[0] += requests_count % concurrency
+        started = perf_counter()
+        if concurrency == 1:
+            samples = worker(method, url, user, requests_count, cold)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = [
+                    executor.submit(worker, method, url, user, share, cold)
+                    for share in shares
+                ]
+                samples = [sample for future in futures
+                           for sample in future.result()]
+        report[name] = summarize(samples, perf_counter() - started)
+    return report
+
+
+def compare(report, baseline):
+    """Относительное изменение метрик отчёта к базовому, в процентах."""
+    changes = {}
+    for name, metrics in report.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        changes[name] = {
+            key: (value - base[key]) / base[key] * 100
+            for key, value in metrics.items()
+            if key in ('p50', 'p95', 'p99', 'queries', 'rps')
+            and value is not None and base.get(key)
+        }
+    return changes
+
+
+def _photo(width, height):
+    """JPEG с шумом заданного размера: сжимается плохо, как снимок."""
+    image = Image.merge('RGB', [
+        Image.effect_noise((width, height), 48) for _ in range(3)])
+    output = BytesIO()
+    image.save(output, 'JPEG', quality=90)
+    return output.getvalue()
+
+
+def _megabytes(image):
+    width, height = image.size
+    return width * height * len(image.getbands()) / 2 ** 20
+
+
+def upload_images(sizes=IMAGE_SIZES, repeat=3):
+    """Время нормализации загрузки и размер декодированного буфера.
+
+    `full_mb` — сколько занял бы в памяти полностью декодированный
+    оригинал, `decoded_mb` — сколько декодируется на самом деле.
+    """
+    report = {}
+    for width, height in sizes:
+        data = _photo(width, height)
+        latencies = []
+        for _ in range(repeat):
+            upload = SimpleUploadedFile('photo.jpg', data, 'image/jpeg')
+            started = perf_counter()
+            image = images.open_checked(upload)
+            full_mb = _megabytes(image)
+            with image:
+                output = images.encode(images.decode(image), upload.name)
+                decoded_mb = _megabytes(image)
+            latencies.append(perf_counter() - started)
+        report[f'{width}x{height}'] = {
+            'ms': sorted(latencies)[len(latencies) // 2] * 1000,
+            'input_kb': len(data) / 1024,
+            'output_kb': output.size / 1024,
+            'full_mb': full_mb,
+            'decoded_mb': decoded_mb,
+        }
+    return report
+
+
+def _drain(response):
+    size = 0
+    for chunk in response.streaming_content:
+        size += len(chunk)
+    response.close()
+    return size
+
+
+def media_throughput(file_mb=MEDIA_FILE_MB, repeat=5):
+    """Время отдачи медиафайла и скорость выдачи тела ответа, МБ/с.
+
+    `static_serve` — прежний помощник `django.views.static.serve`,
+    `media_serve` — новый view целиком, `range` — отрезок в 1 МБ из
+    середины файла, `offload` — ответ с X-Accel-Redirect, после
+    которого файл отдаёт nginx. Sendfile самого WSGI-сервера здесь не
+    участвует: он обходит Python и на замер не влияет.
+    """
+    factory = RequestFactory()
+    root = tempfile.mkdtemp()
+    name = 'benchmark.bin'
+    with open(os.path.join(root, name), 'wb') as file:
+        file.write(os.urandom(file_mb * 2 ** 20))
+    middle = file_mb * 2 ** 19
+    cases = {
+        'static_serve': (
+            lambda request: serve(request, name, document_root=root), {},
+            {}),
+        'media_serve': (partial(media_serve, path=name), {}, {}),
+        'range': (
+            partial(media_serve, path=name),
+            {'HTTP_RANGE': f'bytes={middle}-{middle + 2 ** 20 - 1}'}, {}),
+        'offload': (
+            partial(media_serve, path=name), {},
+            {'MEDIA_SENDFILE': 'x-accel-redirect'}),
+    }
+    report = {}
+    try:
+        for case, (view, headers, overrides) in cases.items():
+            latencies = []
+            with override_settings(MEDIA_ROOT=root, **overrides):
+                for _ in range(repeat):
+                    request = factory.get(f'{settings.MEDIA_URL}{name}',
+                                          **headers)
+                    started = perf_counter()
+                    response = view(request)
+                    if response.streaming:
+                        size = _drain(response)
+                    else:
+                        size = len(response.content)
+                    latencies.append(perf_counter() - started)
+            elapsed = sorted(latencies)[len(latencies) // 2]
+            report[case] = {
+                'ms': elapsed * 1000,
+                'body_mb': size / 2 ** 20,
+                'mb_per_s': size / 2 ** 20 / elapsed,
+            }
+    finally:
+        os.remove(os.path.join(root, name))
+        os.rmdir(root)
+    return report
@@ -0,0 +1,39 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATE = 'posts/includes/post_list.html'
+CARD_KEY = 'card:{}:{}'
+
+
+def card_version(post):
+    """Версия карточки из всех полей, которые попадают в её разметку.
+
+    Правка текста, смена картинки или группы и переименование автора
+    дают новую версию, поэтому старые карточки просто перестают читаться.
+    """
+    author = post.author
+    parts = (
+        post.text, post.pub_date.isoformat(), post.image.name or '',
+        post.thumbnail_url, post.group_id or '', author.username,
+        author.first_name, author.last_name,
+    )
+    return md5('\x1f'.join(map(str, parts)).encode()).hexdigest()
+
+
+def render_cards(posts):
+    """Вернуть пары (пост, HTML карточки), читая кэш одним get_many."""
+    posts = list(posts)
+    keys = [CARD_KEY.format(post.pk, card_version(post)) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {}
+    for key, post in zip(keys, posts):
+        if key not in cards:
+            missing[key] = render_to_string(CARD_TEMPLATE, {'post': post})
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return [(post, mark_safe(cards[key])) for key, post in zip(keys, posts)]
@@ -0,0 +1,61 @@
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Post, User
+
+
+def stats_of(user):
+    """Счётчики пользователя; без записи в базе — нулевые."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        return AuthorStats(user=user)
+
+
+def _count(model, field, outer='pk'):
+    rows = (
+        model.objects.filter(**{field: OuterRef(outer)})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def _author_counts():
+    return {
+        'posts_count': _count(Post, 'author', 'user_id'),
+        'followers_count': _count(Follow, 'author', 'user_id'),
+        'following_count': _count(Follow, 'user', 'user_id'),
+    }
+
+
+def reconcile_authors(user_ids):
+    """Пересчитать счётчики авторов по фактическим данным."""
+    missing = User.objects.filter(
+        pk__in=user_ids, stats__isnull=True).values_list('pk', flat=True)
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=pk) for pk in missing],
+        ignore_conflicts=True,
+    )
+    AuthorStats.objects.filter(user_id__in=user_ids).update(
+        **_author_counts())
+
+
+def reconcile_posts(post_ids):
+    """Пересчитать число комментариев постов по фактическим данным."""
+    Post.objects.filter(pk__in=post_ids).update(
+        comments_count=_count(Comment, 'post'))
+
+
+def recount():
+    """Пересчитать все счётчики по фактическим данным."""
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True)
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=pk) for pk in missing],
+        ignore_conflicts=True,
+    )
+    Post.objects.update(comments_count=_count(Comment, 'post'))
+    AuthorStats.objects.update(**_author_counts())
@@ -0,0 +1,70 @@
+import csv
+import json
+
+from django.conf import settings
+
+from .models import Comment, Post
+
+COLUMNS = ('type', 'id', 'post', 'author', 'group', 'text', 'pub_date',
+           'image')
+
+
+def rows(author=None, group=None, chunk_size=None):
+    """Посты, затем комментарии автора, группы или всего сайта.
+
+    Строки читаются курсором пачками по `chunk_size`, поэтому память
+    не зависит от размера выгрузки.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    posts = Post.objects.order_by('pk')
+    comments = Comment.objects.order_by('pk')
+    if author:
+        posts = posts.filter(author__username=author)
+        comments = comments.filter(author__username=author)
+    if group:
+        posts = posts.filter(group__slug=group)
+        comments = comments.filter(post__group__slug=group)
+    posts = posts.values_list(
+        'pk', 'author__username', 'group__slug', 'text', 'pub_date', 'image')
+    for pk, username, slug, text, pub_date, image in posts.iterator(
+            chunk_size=chunk_size):
+        yield {
+            'type': 'post', 'id': pk, 'post': None, 'author': username,
+            'group': slug, 'text': text, 'pub_date': pub_date.isoformat(),
+            'image': image or None,
+        }
+    comments = comments.values_list(
+        'pk', 'post_id', 'author__username', 'post__group__slug', 'text',
+        'created')
+    for pk, post_id, username, slug, text, created in comments.iterator(
+            chunk_size=chunk_size):
+        yield {
+            'type': 'comment', 'id': pk, 'post': post_id,
+            'author': username, 'group': slug, 'text': text,
+            'pub_date': created.isoformat(), 'image': None,
+        }
+
+
+def to_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def to_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow(
+            ['' if row[column] is None else row[column]
+             for column in COLUMNS])
+
+
+FORMATS = {
+    'ndjson': (to_ndjson, 'application/x-ndjson'),
+    'csv': (to_csv, 'text/csv'),
+}
@@ -0,0 +1,71 @@
+import os
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageOps
+
+EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+
+
+def open_checked(upload):
+    """Открыть картинку, прочитав только заголовок, и проверить размеры."""
+    upload.seek(0)
+    try:
+        image = Image.open(upload)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError('Загрузите правильное изображение.')
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            f'Изображение {width}×{height} слишком большое.')
+    return image
+
+
+def decode(image):
+    """Декодировать не больше нужного и уменьшить до `IMAGE_MAX_SIDE`.
+
+    JPEG декодируется сразу в уменьшенном масштабе через draft, поэтому
+    снимок с камеры не разворачивается в памяти целиком. Поворот из EXIF
+    применяется к пикселям, сами метаданные дальше не сохраняются.
+    """
+    side = settings.IMAGE_MAX_SIDE
+    ratio = min(1, side / max(image.size))
+    image.draft('RGB', tuple(round(size * ratio) for size in image.size))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((side, side), Image.LANCZOS)
+    return image
+
+
+def _output_format(image):
+    output_format = settings.IMAGE_FORMAT
+    if output_format not in Image.SAVE:
+        output_format = 'JPEG'
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info)
+    if has_alpha and output_format == 'JPEG':
+        return 'PNG', 'RGBA'
+    return output_format, 'RGBA' if has_alpha else 'RGB'
+
+
+def encode(image, name):
+    """Сохранить картинку в `IMAGE_FORMAT` без метаданных."""
+    output_format, mode = _output_format(image)
+    if output_format == 'PNG' and image.mode == 'P':
+        mode = 'P'
+    image = image.convert(mode)
+    output = SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    image.save(output, output_format, quality=settings.IMAGE_QUALITY,
+               optimize=True)
+    output.seek(0)
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return File(output, name=f'{stem}.{EXTENSIONS[output_format]}')
+
+
+def normalize(upload):
+    """Загруженная картинка в виде уменьшенного мастера без EXIF."""
+    image = open_checked(upload)
+    with image:
+        return encode(decode(image), upload.name)
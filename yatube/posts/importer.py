@@ -0,0 +1,194 @@
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, invalidation, timeline
+from .models import Group, Post, User
+from .search import get_backend as search_backend
+from .seeding import explicit_dates, rebuild_derived
+
+REBUILD_CHUNK_SIZE = 500
+
+
+def read_rows(stream, output_format):
+    """Строки NDJSON или CSV как словари, по одной за раз.
+
+    Неразборчивая строка NDJSON отдаётся пустым словарём, чтобы импорт
+    посчитал её пропущенной, а не остановился.
+    """
+    if output_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {}
+
+
+def _pub_date(value):
+    """Дата публикации строки; None, если её нельзя разобрать.
+
+    Пустое значение — текущее время, дата без часового пояса считается
+    по TIME_ZONE.
+    """
+    if not value:
+        return timezone.now()
+    try:
+        pub_date = parse_datetime(value)
+    except ValueError:
+        return None
+    if pub_date is not None and timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class PostImporter:
+    """Загрузка постов пачками bulk_create.
+
+    Авторы и группы ищутся по словарям в памяти, которые дополняются
+    одним запросом на пачку; картинки принятых строк копируются
+    в `MEDIA_ROOT/posts/` пулом потоков. Загруженные посты — те, чей pk
+    больше последнего до импорта; по ним `finish` обновляет счётчики,
+    ленты и поиск.
+    """
+
+    def __init__(self, batch_size=1000, images_dir=None, workers=4,
+                 create_missing=False, log=None):
+        self.batch_size = batch_size
+        self.images_dir = images_dir
+        self.workers = workers
+        self.create_missing = create_missing
+        self.log = log or (lambda message: None)
+        self.authors = {}
+        self.groups = {}
+        self.last_pk = None
+        self.imported_authors = set()
+        self.stats = {'imported': 0, 'skipped': 0, 'images': 0,
+                      'image_errors': 0}
+
+    def _resolve(self, model, field, names, known, defaults):
+        missing = {name for name in names if name and name not in known}
+        if not missing:
+            return
+        known.update(model.objects.filter(
+            **{f'{field}__in': missing}).values_list(field, 'pk'))
+        missing -= set(known)
+        if missing and self.create_missing:
+            model.objects.bulk_create(
+                [model(**{field: name}, **defaults(name))
+                 for name in missing],
+                ignore_conflicts=True,
+            )
+            known.update(model.objects.filter(
+                **{f'{field}__in': missing}).values_list(field, 'pk'))
+
+    def _copy_image(self, path):
+        if not path:
+            return ''
+        source = os.path.join(self.images_dir or '', path)
+        try:
+            with open(source, 'rb') as image:
+                return Post._meta.get_field('image').storage.save(
+                    f'posts/{os.path.basename(path)}', File(image))
+        except OSError:
+            return None
+
+    def _accepted(self, batch):
+        accepted = []
+        for row in batch:
+            pub_date = _pub_date(row.get('pub_date'))
+            if (row.get('author') in self.authors and row.get('text')
+                    and pub_date is not None):
+                accepted.append({**row, 'pub_date': pub_date})
+            else:
+                self.stats['skipped'] += 1
+        return accepted
+
+    def _build(self, rows, images):
+        posts = []
+        for row, image in zip(rows, images):
+            if image is None:
+                self.stats['image_errors'] += 1
+                image = ''
+            elif image:
+                self.stats['images'] += 1
+            author_id = self.authors[row['author']]
+            self.imported_authors.add(author_id)
+            posts.append(Post(
+                text=row['text'],
+                author_id=author_id,
+                group_id=self.groups.get(row.get('group') or None),
+                image=image,
+                pub_date=row['pub_date'],
+            ))
+        return posts
+
+    def run(self, rows):
+        password = make_password(None)
+        started = perf_counter()
+        if self.last_pk is None:
+            self.last_pk = Post.objects.order_by('-pk').values_list(
+                'pk', flat=True).first() or 0
+        rows = (row for row in rows if row.get('type', 'post') == 'post')
+        with ThreadPoolExecutor(max_workers=self.workers) as executor, \
+                explicit_dates():
+            for batch in _batches(rows, self.batch_size):
+                self._resolve(
+                    User, 'username', [row.get('author') for row in batch],
+                    self.authors, lambda name: {'password': password})
+                self._resolve(
+                    Group, 'slug', [row.get('group') for row in batch],
+                    self.groups,
+                    lambda name: {'title': name[:200], 'description': ''})
+                accepted = self._accepted(batch)
+                images = executor.map(
+                    self._copy_image, [row.get('image') for row in accepted])
+                posts = self._build(accepted, images)
+                with transaction.atomic():
+                    Post.objects.bulk_create(posts)
+                self.stats['imported'] += len(posts)
+                elapsed = perf_counter() - started
+                self.log(f'posts: {self.stats["imported"]} '
+                         f'({self.stats["imported"] / elapsed:.0f}/с)')
+        return self.stats
+
+    def finish(self, full=False):
+        """Обновить производные данные: по загруженным постам и их
+        авторам или, с `full`, полным пересчётом."""
+        if full:
+            rebuild_derived(self.log)
+            return
+        started = perf_counter()
+        for authors in _batches(sorted(self.imported_authors),
+                                REBUILD_CHUNK_SIZE):
+            counters.reconcile_authors(authors)
+            timeline.refresh(authors)
+        backend = search_backend()
+        for post in Post.objects.filter(pk__gt=self.last_pk or 0).only(
+                'pk', 'text').iterator():
+            backend.index(post)
+        invalidation.posts_loaded()
+        self.log(f'rebuild: {perf_counter() - started:.1f} с')
@@ -0,0 +1,152 @@
+from core.cache import bump
+
+from .models import Comment, Follow, Post, User
+from .timeline import pull_authors
+
+INDEX = 'index'
+GROUPS = 'groups'
+PULL = 'pull'
+COMMENT_COUNTS = 'comment-counts'
+BUMP_CHUNK_SIZE = 1000
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def follower_scope(user_id):
+    return f'follower:{user_id}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def index_scopes(request):
+    return INDEX, GROUPS
+
+
+def group_scopes(request, slug):
+    return group_scope(slug), GROUPS
+
+
+def profile_scopes(request, username):
+    return author_scope(username), GROUPS
+
+
+def follow_scopes(request):
+    return follower_scope(request.user.pk), PULL, GROUPS
+
+
+def post_detail_scopes(request, post_id):
+    username = Post.objects.filter(pk=post_id).values_list(
+        'author__username', flat=True).first()
+    if username is None:
+        return None
+    return post_scope(post_id), author_scope(username), GROUPS
+
+
+def comments_scopes(request, post_id):
+    return (post_scope(post_id),)
+
+
+def with_comment_counts(get_scopes):
+    """Области ленты, в которой видно число комментариев каждого поста."""
+    def scopes(request, *args, **kwargs):
+        return (*get_scopes(request, *args, **kwargs), COMMENT_COUNTS)
+    return scopes
+
+
+def _bump_chunked(scopes):
+    chunk = []
+    for scope in scopes:
+        chunk.append(scope)
+        if len(chunk) == BUMP_CHUNK_SIZE:
+            bump(*chunk)
+            chunk = []
+    if chunk:
+        bump(*chunk)
+
+
+def post_changed(post, group_slugs=None):
+    """Сбросить общую ленту, ленты групп, профиль и страницу поста.
+
+    Ленты подписок сбрасывает `follow_feeds_changed` из задачи: у автора
+    могут быть тысячи читателей. Без `group_slugs` берётся текущая группа
+    поста.
+    """
+    if group_slugs is None:
+        group_slugs = [post.group.slug] if post.group_id else []
+    bump(INDEX, post_scope(post.pk), author_scope(post.author.username),
+         *(group_scope(slug) for slug in group_slugs))
+
+
+def follow_feeds_changed(author_ids):
+    """Сбросить ленты подписок, в которых видны посты авторов."""
+    pull = pull_authors()
+    if pull & set(author_ids):
+        bump(PULL)
+    followers = Follow.objects.filter(
+        author_id__in=set(author_ids) - pull).order_by().values_list(
+        'user_id', flat=True).distinct()
+    _bump_chunked(follower_scope(user_id) for user_id in followers.iterator())
+
+
+def comment_changed(comment):
+    bump(post_scope(comment.post_id))
+
+
+def comments_counted(post_ids):
+    """Сбросить страницы с пересчитанным числом комментариев постов."""
+    bump(COMMENT_COUNTS, *(post_scope(post_id) for post_id in post_ids))
+
+
+def authors_counted(user_ids):
+    """Сбросить страницы авторов с пересчитанными счётчиками."""
+    usernames = User.objects.filter(pk__in=user_ids).values_list(
+        'username', flat=True)
+    bump(*(author_scope(username) for username in usernames))
+
+
+def follow_changed(follow):
+    bump(follower_scope(follow.user_id), author_scope(follow.author.username))
+
+
+def timeline_changed(user_id):
+    bump(follower_scope(user_id))
+
+
+def group_changed(group, previous_slug=None, shown_in_feeds=True):
+    """Сбросить страницу группы, а с `shown_in_feeds` и все ленты:
+    название и слаг группы видны в карточках её постов."""
+    scopes = {group_scope(group.slug)}
+    if previous_slug:
+        scopes.add(group_scope(previous_slug))
+    if shown_in_feeds:
+        scopes.add(GROUPS)
+    bump(*scopes)
+
+
+def posts_loaded():
+    """Сбросить ленты после загрузки постов в обход сигналов.
+
+    GROUPS входит в области каждой ленты и страницы поста; списки
+    комментариев новые посты не меняют.
+    """
+    bump(INDEX, GROUPS, PULL)
+
+
+def bulk_loaded():
+    """Сбросить страницы после загрузки данных в обход сигналов.
+
+    GROUPS входит в области каждой ленты и страницы поста, а списки
+    комментариев сбрасываются по областям постов, у которых они есть.
+    """
+    bump(INDEX, GROUPS, PULL, COMMENT_COUNTS)
+    commented = Comment.objects.order_by().values_list(
+        'post_id', flat=True).distinct()
+    _bump_chunked(post_scope(post_id) for post_id in commented.iterator())
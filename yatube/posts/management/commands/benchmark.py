@@ -0,0 +1,101 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts import benchmark, seeding
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный прогон view Yatube: задержки, запросы к БД, RPS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true',
+                            help='Сначала заполнить базу тестовыми данными')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--follows', type=int, default=10000)
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument('--scenario', action='append',
+                            choices=benchmark.SCENARIOS,
+                            help='Сценарий; по умолчанию все')
+        parser.add_argument('--requests', type=int, default=100,
+                            help='Запросов на сценарий')
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кэш перед каждым запросом')
+        parser.add_argument('--server',
+                            help='Адрес запущенного сервера, например '
+                                 'http://127.0.0.1:8000')
+        parser.add_argument('--images', action='store_true',
+                            help='Замерить нормализацию загружаемых '
+                                 'картинок вместо view')
+        parser.add_argument('--media', action='store_true',
+                            help='Замерить отдачу медиафайлов вместо '
+                                 'view')
+        parser.add_argument('--output', help='Сохранить отчёт в JSON')
+        parser.add_argument('--baseline',
+                            help='JSON-отчёт для сравнения')
+
+    def handle(self, *args, **options):
+        if options['images']:
+            self.images(options['output'])
+            return
+        if options['media']:
+            self.media(options['output'])
+            return
+        if options['seed']:
+            seeding.seed(
+                options['users'], options['groups'], options['posts'],
+                options['comments'], options['follows'],
+                seed=options['random_seed'])
+        report = benchmark.run(
+            scenarios=options['scenario'] or benchmark.SCENARIOS,
+            requests_count=options['requests'],
+            concurrency=options['concurrency'],
+            cold=options['cold'],
+            base_url=options['server'],
+        )
+        changes = {}
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                changes = benchmark.compare(report, json.load(baseline))
+        for name, metrics in report.items():
+            line = (f'{name:<14} p50 {metrics["p50"]:8.2f} ms  '
+                    f'p95 {metrics["p95"]:8.2f} ms  '
+                    f'p99 {metrics["p99"]:8.2f} ms  '
+                    f'rps {metrics["rps"]:8.1f}  '
+                    f'queries {metrics["queries"]}')
+            if name in changes:
+                line += '  ' + ' '.join(
+                    f'{key} {value:+.1f}%'
+                    for key, value in changes[name].items())
+            self.stdout.write(line)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+
+    def images(self, output):
+        report = benchmark.upload_images()
+        for name, metrics in report.items():
+            self.stdout.write(
+                f'{name:<10} {metrics["ms"]:8.1f} ms  '
+                f'{metrics["input_kb"]:8.0f} KB -> '
+                f'{metrics["output_kb"]:6.0f} KB  '
+                f'decoded {metrics["decoded_mb"]:6.1f} MB '
+                f'of {metrics["full_mb"]:6.1f} MB')
+        if output:
+            with open(output, 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+
+    def media(self, output):
+        report = benchmark.media_throughput()
+        for name, metrics in report.items():
+            self.stdout.write(
+                f'{name:<14} {metrics["ms"]:8.1f} ms  '
+                f'body {metrics["body_mb"]:6.1f} MB  '
+                f'{metrics["mb_per_s"]:8.0f} MB/s')
+        if output:
+            with open(output, 'w') as output_file:
+                json.dump(report, output_file, indent=2)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = 'Выгрузить посты и комментарии в NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--author', help='Только посты и комментарии '
+                                             'этого пользователя')
+        parser.add_argument('--group', help='Только посты группы и '
+                                            'комментарии к ним')
+        parser.add_argument('--format', choices=export.FORMATS,
+                            default='ndjson')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout')
+        parser.add_argument('--chunk-size', type=int)
+
+    def handle(self, *args, **options):
+        render_rows = export.FORMATS[options['format']][0]
+        lines = render_rows(export.rows(
+            author=options['author'],
+            group=options['group'],
+            chunk_size=options['chunk_size'],
+        ))
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8',
+                  newline='') as output:
+            output.writelines(lines)
@@ -0,0 +1,54 @@
+import sys
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from posts.importer import PostImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Загрузить посты из NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл выгрузки или - для stdin')
+        parser.add_argument('--format', choices=('ndjson', 'csv'),
+                            help='По умолчанию по расширению файла')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--images-dir',
+                            help='Каталог, от которого отсчитываются '
+                                 'пути картинок')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Потоков для копирования картинок')
+        parser.add_argument('--create-missing', action='store_true',
+                            help='Создавать неизвестных авторов и группы')
+        parser.add_argument('--skip-rebuild', action='store_true',
+                            help='Не пересчитывать счётчики, ленты и поиск')
+        parser.add_argument('--full-rebuild', action='store_true',
+                            help='Пересчитать счётчики, ленты и поиск '
+                                 'целиком, а не по загруженным постам')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        output_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson')
+        importer = PostImporter(
+            batch_size=options['batch_size'],
+            images_dir=options['images_dir'],
+            workers=options['workers'],
+            create_missing=options['create_missing'],
+            log=self.stdout.write,
+        )
+        started = perf_counter()
+        if path == '-':
+            stats = importer.run(read_rows(sys.stdin, output_format))
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                stats = importer.run(read_rows(stream, output_format))
+        if not options['skip_rebuild']:
+            importer.finish(full=options['full_rebuild'])
+        elapsed = perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {stats["imported"]}, пропущено: '
+            f'{stats["skipped"]}, картинок: {stats["images"]} '
+            f'(ошибок: {stats["image_errors"]}) за {elapsed:.1f} с, '
+            f'{stats["imported"] / elapsed:.0f} постов/с'))
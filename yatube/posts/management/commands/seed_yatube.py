@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts import seeding
+
+
+class Command(BaseCommand):
+    help = ('Сгенерировать большой набор пользователей, групп, постов, '
+            'комментариев и подписок')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--follows', type=int, default=100000,
+                            help='Примерное общее число подписок')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Повторный запуск с тем же seed '
+                                 'продолжает прерванную генерацию')
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help='Строк в одной транзакции')
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Показатель степенного распределения '
+                                 'авторов и подписок')
+        parser.add_argument('--images', type=float, default=0.0,
+                            help='Доля постов с картинкой, от 0 до 1')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = OFF')
+                cursor.execute('PRAGMA temp_store = MEMORY')
+        seeding.seed(
+            options['users'], options['groups'], options['posts'],
+            options['comments'], options['follows'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            exponent=options['exponent'],
+            image_share=options['images'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS('Данные сгенерированы'))
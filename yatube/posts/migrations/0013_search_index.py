@@ -0,0 +1,38 @@
+from django.db import migrations
+
+SEARCH_SOURCES = (
+    ('posts_post', 'text', 0),
+    ('posts_comment', 'text', 1),
+    ('posts_group', 'title', 2),
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE posts_search USING fts5("
+        "body, tokenize='unicode61 remove_diacritics 2')"
+    )
+    for table, column, code in SEARCH_SOURCES:
+        schema_editor.execute(
+            f'INSERT INTO posts_search (rowid, body) '
+            f'SELECT id * {len(SEARCH_SOURCES)} + {code}, {column} '
+            f'FROM {table}'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_thumbnail_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,179 @@
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.module_loading import import_string
+
+from .models import Comment, Group, Post
+
+SEARCH_TABLE = 'posts_search'
+KINDS = {Post: 0, Comment: 1, Group: 2}
+KIND_COUNT = len(KINDS)
+TOKEN_RE = re.compile(r'\w+')
+
+SearchHit = namedtuple('SearchHit', 'kind object rank')
+
+
+def _row_id(instance):
+    return instance.pk * KIND_COUNT + KINDS[type(instance)]
+
+
+def _body(instance):
+    if isinstance(instance, Group):
+        return instance.title
+    return instance.text
+
+
+def _match_expression(query):
+    """Запрос пользователя как безопасное выражение FTS5: все слова сразу."""
+    return ' '.join(f'"{token}"' for token in TOKEN_RE.findall(query))
+
+
+def _encode_cursor(rank, row_id):
+    return urlsafe_base64_encode(f'{rank!r}|{row_id}'.encode())
+
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        rank, row_id = urlsafe_base64_decode(cursor).decode().split('|')
+        return float(rank), int(row_id)
+    except ValueError:
+        return None
+
+
+def _load(rows):
+    """Превратить пары (rowid, rank) в найденные объекты."""
+    ids = {kind: [] for kind in KINDS.values()}
+    for row_id, _ in rows:
+        ids[row_id % KIND_COUNT].append(row_id // KIND_COUNT)
+    objects = {
+        KINDS[Post]: Post.objects.for_feed().in_bulk(ids[KINDS[Post]]),
+        KINDS[Comment]: Comment.objects.select_related('author').in_bulk(
+            ids[KINDS[Comment]]),
+        KINDS[Group]: Group.objects.in_bulk(ids[KINDS[Group]]),
+    }
+    names = {code: model._meta.model_name for model, code in KINDS.items()}
+    hits = []
+    for row_id, rank in rows:
+        code = row_id % KIND_COUNT
+        instance = objects[code].get(row_id // KIND_COUNT)
+        if instance is not None:
+            hits.append(SearchHit(names[code], instance, rank))
+    return hits
+
+
+class SearchBackend:
+    """Интерфейс поискового индекса по постам, комментариям и группам."""
+
+    def index(self, instance):
+        raise NotImplementedError
+
+    def remove(self, instance):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def search(self, query, after=None, limit=10):
+        """Вернуть найденные объекты и курсор следующей страницы."""
+        raise NotImplementedError
+
+
+class SqliteFtsBackend(SearchBackend):
+    """Инвертированный индекс SQLite FTS5, ранжирование по bm25."""
+
+    def index(self, instance):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, body) '
+                f'VALUES (%s, %s)',
+                [_row_id(instance), _body(instance)],
+            )
+
+    def remove(self, instance):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s',
+                [_row_id(instance)],
+            )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+            for model, code in KINDS.items():
+                column = 'title' if model is Group else 'text'
+                cursor.execute(
+                    f'INSERT INTO {SEARCH_TABLE} (rowid, body) '
+                    f'SELECT id * {KIND_COUNT} + {code}, {column} '
+                    f'FROM {model._meta.db_table}'
+                )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) "
+                f"VALUES ('optimize')"
+            )
+
+    def search(self, query, after=None, limit=10):
+        expression = _match_expression(query)
+        if not expression:
+            return [], None
+        sql = (f'SELECT rowid, bm25({SEARCH_TABLE}) AS score '
+               f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s')
+        params = [expression]
+        cursor_value = _decode_cursor(after)
+        if cursor_value is not None:
+            sql += (f' AND (bm25({SEARCH_TABLE}) > %s OR '
+                    f'(bm25({SEARCH_TABLE}) = %s AND rowid > %s))')
+            params += [cursor_value[0], cursor_value[0], cursor_value[1]]
+        sql += ' ORDER BY score, rowid LIMIT %s'
+        params.append(limit + 1)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor(rows[-1][1], rows[-1][0])
+        return _load(rows), next_cursor
+
+
+class PostTextBackend(SearchBackend):
+    """Запасной поиск без индекса: подстрока в тексте постов."""
+
+    def index(self, instance):
+        pass
+
+    def remove(self, instance):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, after=None, limit=10):
+        if not query.strip():
+            return [], None
+        posts = Post.objects.for_feed().filter(
+            text__icontains=query.strip()).order_by('-pk')
+        cursor_value = _decode_cursor(after)
+        if cursor_value is not None:
+            posts = posts.filter(pk__lt=cursor_value[1])
+        posts = list(posts[:limit + 1])
+        next_cursor = None
+        if len(posts) > limit:
+            posts = posts[:limit]
+            next_cursor = _encode_cursor(0.0, posts[-1].pk)
+        return [SearchHit('post', post, 0.0) for post in posts], next_cursor
+
+
+_backends = {}
+
+
+def get_backend():
+    """Поисковый бэкенд из настройки `SEARCH_BACKEND`."""
+    path = settings.SEARCH_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
@@ -0,0 +1,258 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from io import BytesIO
+from itertools import accumulate
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import AutoField
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from . import counters, invalidation, timeline
+from .models import Comment, Follow, Group, Post, User
+from .search import get_backend as search_backend
+
+SEED_PASSWORD = 'yatube-seed'
+TEXT_POOL_SIZE = 1000
+IMAGE_POOL_SIZE = 8
+BULK_BATCH_SIZE = 1000
+START_DATE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def zipf_weights(size, exponent):
+    """Накопленные веса степенного закона для `random.choices`."""
+    return list(accumulate(
+        1 / (rank + 1) ** exponent for rank in range(size)))
+
+
+def rebuild_derived(log=None):
+    """Пересчитать счётчики, ленты и поисковый индекс после bulk_create,
+    который не вызывает сигналы, и сбросить закэшированные страницы."""
+    for name, step in (('counters', counters.recount),
+                       ('timeline', timeline.rebuild),
+                       ('search', search_backend().rebuild),
+                       ('cache', invalidation.bulk_loaded)):
+        started = perf_counter()
+        step()
+        if log:
+            log(f'{name}: {perf_counter() - started:.1f} с')
+
+
+def _batch_size(model, objects):
+    """Размер пачки INSERT в пределах ограничений базы: явный batch_size
+    в bulk_create не сверяется с ними, а SQLite принимает не больше
+    500 строк и 999 параметров на запрос."""
+    fields = [field for field in model._meta.concrete_fields
+              if not isinstance(field, AutoField)]
+    return max(1, min(BULK_BATCH_SIZE,
+                      connection.ops.bulk_batch_size(fields, objects)))
+
+
+@contextmanager
+def explicit_dates():
+    """Разрешить bulk_create сохранять заданные даты вместо текущей."""
+    fields = (
+        Post._meta.get_field('pub_date'),
+        Comment._meta.get_field('created'),
+    )
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Seeder:
+    """Генератор больших наборов данных пачками bulk_create.
+
+    Каждая пачка строится из своего генератора случайных чисел
+    (seed, вид, номер пачки) и пишется в отдельной транзакции, поэтому
+    повторный запуск с тем же seed продолжает с первой недостающей пачки
+    и даёт те же данные.
+    """
+
+    def __init__(self, seed=0, chunk_size=10000, exponent=1.1,
+                 image_share=0.0, log=None):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.exponent = exponent
+        self.image_share = image_share
+        self.log = log or (lambda message: None)
+        self.prefix = f'seed{seed}_'
+        fake = Faker('ru_RU')
+        fake.seed_instance(seed)
+        self.texts = [fake.text() for _ in range(TEXT_POOL_SIZE)]
+        self.titles = [fake.sentence(nb_words=3)[:200]
+                       for _ in range(TEXT_POOL_SIZE)]
+
+    def _rng(self, kind, chunk):
+        return random.Random(f'{self.seed}:{kind}:{chunk}')
+
+    def _chunks(self, kind, total, done, build, model):
+        """Записать недостающие пачки вида `kind`.
+
+        Недописанная пачка строится целиком, чтобы получить те же данные,
+        а записываются только объекты начиная с `done`.
+        """
+        if done >= total:
+            return
+        started = perf_counter()
+        for chunk in range(done // self.chunk_size,
+                           -(-total // self.chunk_size)):
+            first = chunk * self.chunk_size
+            last = min(total, first + self.chunk_size)
+            objects = build(self._rng(kind, chunk), first, last)
+            objects = objects[max(0, done - first):]
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    objects, batch_size=_batch_size(model, objects))
+            self.log(f'{kind}: {last}/{total} '
+                     f'({last / (perf_counter() - started):.0f}/с)')
+
+    def _user_ids(self):
+        return list(User.objects.filter(
+            username__startswith=self.prefix).order_by('pk').values_list(
+            'pk', flat=True))
+
+    def users(self, total):
+        password = make_password(SEED_PASSWORD)
+
+        def build(rng, first, last):
+            return [User(username=f'{self.prefix}{i}', password=password)
+                    for i in range(first, last)]
+
+        done = User.objects.filter(username__startswith=self.prefix).count()
+        self._chunks('users', total, done, build, User)
+
+    def groups(self, total):
+        slug_prefix = self.prefix.replace('_', '-')
+
+        def build(rng, first, last):
+            return [Group(title=rng.choice(self.titles),
+                          slug=f'{slug_prefix}{i}',
+                          description=rng.choice(self.texts))
+                    for i in range(first, last)]
+
+        done = Group.objects.filter(slug__startswith=slug_prefix).count()
+        self._chunks('groups', total, done, build, Group)
+
+    def _images(self):
+        storage = Post._meta.get_field('image').storage
+        names = []
+        for i in range(IMAGE_POOL_SIZE):
+            buffer = BytesIO()
+            color = self._rng('images', i).randrange(0xFFFFFF)
+            Image.new('RGB', (960, 640), color).save(buffer, 'JPEG')
+            names.append(storage.save(
+                f'posts/{self.prefix}{i}.jpg', ContentFile(buffer.getvalue())))
+        return names
+
+    def posts(self, total):
+        authors = self._user_ids()
+        weights = zipf_weights(len(authors), self.exponent)
+        groups = list(Group.objects.filter(
+            slug__startswith=self.prefix.replace('_', '-')).values_list(
+            'pk', flat=True))
+        images = self._images() if self.image_share else []
+
+        def build(rng, first, last):
+            posts = []
+            for i, author in zip(
+                range(first, last),
+                rng.choices(authors, cum_weights=weights, k=last - first),
+            ):
+                image = ''
+                if images and rng.random() < self.image_share:
+                    image = rng.choice(images)
+                group = rng.choice(groups) if groups and rng.random() < 0.7 \
+                    else None
+                posts.append(Post(
+                    text=rng.choice(self.texts),
+                    author_id=author,
+                    group_id=group,
+                    image=image,
+                    pub_date=START_DATE + timedelta(minutes=i),
+                ))
+            return posts
+
+        done = Post.objects.filter(
+            author__username__startswith=self.prefix).count()
+        with explicit_dates():
+            self._chunks('posts', total, done, build, Post)
+
+    def comments(self, total):
+        authors = self._user_ids()
+        posts = list(Post.objects.filter(
+            author__username__startswith=self.prefix).order_by(
+            '-pub_date').values_list('pk', 'pub_date'))
+        weights = zipf_weights(len(posts), self.exponent)
+
+        def build(rng, first, last):
+            comments = []
+            for post_id, pub_date in rng.choices(
+                    posts, cum_weights=weights, k=last - first):
+                comments.append(Comment(
+                    text=rng.choice(self.texts),
+                    post_id=post_id,
+                    author_id=rng.choice(authors),
+                    created=pub_date + timedelta(
+                        minutes=rng.randrange(1, 60 * 24)),
+                ))
+            return comments
+
+        done = Comment.objects.filter(
+            author__username__startswith=self.prefix).count()
+        with explicit_dates():
+            self._chunks('comments', total, done, build, Comment)
+
+    def follows(self, total):
+        """Подписки: в среднем total / users на читателя, авторы — по
+        степенному закону; пачка покрывает диапазон читателей."""
+        users = self._user_ids()
+        if not users:
+            return
+        weights = zipf_weights(len(users), self.exponent)
+        mean = total / len(users)
+
+        def build(rng, first, last):
+            follows = []
+            for user in users[first:last]:
+                count = min(len(users) - 1, round(rng.expovariate(1 / mean)))
+                authors = set(rng.choices(users, cum_weights=weights,
+                                          k=count))
+                authors.discard(user)
+                follows.extend(Follow(user_id=user, author_id=author)
+                               for author in sorted(authors))
+            return follows
+
+        last_user = Follow.objects.filter(
+            user__username__startswith=self.prefix).order_by(
+            '-user_id').values_list('user_id', flat=True).first()
+        done = 0
+        if last_user is not None:
+            position = users.index(last_user)
+            done = (position // self.chunk_size + 1) * self.chunk_size
+        if mean:
+            self._chunks('follows', len(users), done, build, Follow)
+
+    def finish(self):
+        rebuild_derived(self.log)
+
+
+def seed(users, groups, posts, comments, follows, **options):
+    """Создать полный набор данных и производные структуры."""
+    seeder = Seeder(**options)
+    seeder.users(users)
+    seeder.groups(groups)
+    seeder.posts(posts)
+    seeder.comments(comments)
+    seeder.follows(follows)
+    seeder.finish()
+    return seeder
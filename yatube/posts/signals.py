@@ -0,0 +1,139 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import invalidation, storage, tasks
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, **kwargs):
+    previous = None
+    if instance.pk:
+        previous = Post.objects.filter(pk=instance.pk).values(
+            'group_id', 'group__slug', 'image').first()
+    previous = previous or {'group_id': None, 'group__slug': None,
+                            'image': ''}
+    instance._previous_group_id = previous['group_id']
+    instance._previous_group_slug = previous['group__slug']
+    instance._previous_image = previous['image']
+    instance._image_changed = previous['image'] != instance.image.name
+    if instance._image_changed:
+        instance.thumbnail_url = ''
+
+
+@receiver(pre_save, sender=Group)
+def remember_previous_group(sender, instance, **kwargs):
+    previous = None
+    if instance.pk:
+        previous = Group.objects.filter(pk=instance.pk).values(
+            'slug', 'title').first()
+    instance._previous_slug = previous and previous['slug']
+    instance._shown_changed = previous is not None and (
+        previous['slug'] != instance.slug
+        or previous['title'] != instance.title)
+
+
+def release_image(name):
+    """Проверить, нужна ли ещё картинка, когда изменение поста записано."""
+    transaction.on_commit(lambda: tasks.images_released.delay(name))
+
+
+@receiver(post_save, sender=Post)
+def enqueue_post_saved(sender, instance, created, **kwargs):
+    image_changed = getattr(instance, '_image_changed', False)
+    tasks.posts_saved.delay(instance.pk, created, image_changed)
+    if image_changed and instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: storage.release_claim(name))
+    previous_image = getattr(instance, '_previous_image', '')
+    if previous_image and image_changed:
+        release_image(previous_image)
+
+
+@receiver(post_delete, sender=Post)
+def enqueue_post_deleted(sender, instance, **kwargs):
+    tasks.posts_deleted.delay(instance.pk, instance.author_id)
+    if instance.image:
+        release_image(instance.image.name)
+
+
+@receiver(post_save, sender=Comment)
+def enqueue_comment_saved(sender, instance, created, **kwargs):
+    tasks.comments_saved.delay(instance.pk, created)
+
+
+@receiver(post_delete, sender=Comment)
+def enqueue_comment_deleted(sender, instance, **kwargs):
+    tasks.comments_deleted.delay(instance.pk, instance.post_id)
+
+
+@receiver(post_save, sender=Follow)
+def enqueue_follow_saved(sender, instance, created, **kwargs):
+    if created:
+        tasks.follows_changed.delay(
+            instance.user_id, instance.author_id, True)
+
+
+@receiver(post_delete, sender=Follow)
+def enqueue_follow_deleted(sender, instance, **kwargs):
+    tasks.follows_changed.delay(instance.user_id, instance.author_id, False)
+
+
+@receiver(post_save, sender=Group)
+def enqueue_group_saved(sender, instance, **kwargs):
+    tasks.groups_saved.delay(instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+def enqueue_group_deleted(sender, instance, **kwargs):
+    tasks.groups_deleted.delay(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    invalidation.post_changed(instance, _group_slugs(instance))
+
+
+def _group_slugs(post):
+    """Слаги прежней и текущей группы поста.
+
+    Если группа не менялась, её слаг уже прочитан в pre_save, и лишнего
+    запроса за группой нет.
+    """
+    slugs = {getattr(post, '_previous_group_slug', None)}
+    if post.group_id and (
+            post.group_id != getattr(post, '_previous_group_id', None)):
+        slugs.add(post.group.slug)
+    return slugs - {None}
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, **kwargs):
+    invalidation.comment_changed(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feeds(sender, instance, **kwargs):
+    invalidation.follow_changed(instance)
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    invalidation.group_changed(
+        instance, getattr(instance, '_previous_slug', None),
+        getattr(instance, '_shown_changed', True))
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_deleted_group_feeds(sender, instance, **kwargs):
+    invalidation.group_changed(instance)
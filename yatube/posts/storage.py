@@ -0,0 +1,63 @@
+import hashlib
+import os
+import posixpath
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from core.cache import lock
+
+IMAGE_LOCK = 'image:{}'
+IMAGE_CLAIM_KEY = 'image-claim:{}'
+
+
+def image_lock(name):
+    """Блокировка файла на время проверки «есть ли он» или «нужен ли он»."""
+    return lock(IMAGE_LOCK.format(name))
+
+
+def release_claim(name):
+    """Снять пометку: пост с файлом записан и сам на него ссылается."""
+    cache.delete(IMAGE_CLAIM_KEY.format(name))
+
+
+def is_claimed(name):
+    """Файл недавно отдан загрузке, чей пост ещё может быть не записан."""
+    return cache.get(IMAGE_CLAIM_KEY.format(name)) is not None
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Файлы по хэшу содержимого: `posts/ab/cd/abcd…ef.jpg`.
+
+    Одинаковые загрузки попадают в один файл, поэтому и миниатюра у них
+    одна. Файл удаляется задачей `posts.tasks.images_released`, когда на
+    него не ссылается ни один пост. Пока пост новой загрузки не записан,
+    ссылки на файл ещё нет, поэтому имя помечается занятым до коммита
+    поста (не дольше `IMAGE_CLAIM_TIMEOUT`), и задача такой файл не
+    трогает.
+    """
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        name = posixpath.join(
+            directory, digest[:2], digest[2:4], f'{digest}{extension}')
+        with image_lock(name):
+            cache.set(IMAGE_CLAIM_KEY.format(name), 1,
+                      settings.IMAGE_CLAIM_TIMEOUT)
+            if self.exists(name):
+                return name
+        temporary = super()._save(f'{name}.{uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+
+content_storage = ContentAddressedStorage()
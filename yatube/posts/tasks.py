@@ -0,0 +1,133 @@
+from django.core.mail import send_mail
+from django.urls import reverse
+
+from core.tasks import task
+
+from . import counters, invalidation, thumbnails, timeline
+from .models import Comment, Group, Post
+from .search import get_backend as search_backend
+from .storage import image_lock, is_claimed
+
+
+@task(batch=True)
+def posts_saved(calls):
+    """Поиск, ленты подписчиков, миниатюры и счётчики после записи постов."""
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        {post_id for post_id, _, _ in calls})
+    created_posts = []
+    for post_id, created, image_changed in calls:
+        post = posts.get(post_id)
+        if post is None:
+            continue
+        search_backend().index(post)
+        if created:
+            timeline.fan_out(post)
+            created_posts.append(post)
+        if image_changed and post.image:
+            thumbnails.generate(post_id)
+    if created_posts:
+        counters.reconcile_authors(
+            {post.author_id for post in created_posts})
+    # Ленты сбрасываются после пересчёта, иначе в кэш попадут старые
+    # счётчики.
+    for post in created_posts:
+        invalidation.post_changed(post)
+    invalidation.follow_feeds_changed(
+        {post.author_id for post in posts.values()})
+
+
+@task(batch=True)
+def posts_deleted(calls):
+    for post_id, _ in calls:
+        search_backend().remove(Post(pk=post_id))
+    authors = {author_id for _, author_id in calls}
+    counters.reconcile_authors(authors)
+    invalidation.authors_counted(authors)
+    invalidation.follow_feeds_changed(authors)
+
+
+@task(batch=True)
+def images_released(calls):
+    """Удалить картинки, на которые больше не ссылается ни один пост.
+
+    Число ссылок на файл считается по постам с ним, поэтому отдельный
+    счётчик не может разойтись с данными. Задача ставится после коммита,
+    когда пост уже удалён или сменил картинку.
+    """
+    upload_to = Post._meta.get_field('image').upload_to
+    names = {name for name, in calls if name.startswith(upload_to)}
+    referenced = set(Post.objects.filter(image__in=names).values_list(
+        'image', flat=True))
+    for name in names - referenced:
+        # Загрузка могла взять этот файл после первой проверки.
+        with image_lock(name):
+            if is_claimed(name) or Post.objects.filter(image=name).exists():
+                continue
+            thumbnails.delete(name)
+
+
+def notify_post_author(comment):
+    author = comment.post.author
+    if not author.email or author.pk == comment.author_id:
+        return
+    url = reverse('posts:post_detail', args=[comment.post_id])
+    send_mail(
+        'Новый комментарий к вашему посту',
+        f'{comment.author.username}: {comment.text}\n\n{url}',
+        None,
+        [author.email],
+    )
+
+
+@task(batch=True)
+def comments_saved(calls):
+    """Поиск, счётчики и письмо автору поста после записи комментариев."""
+    comments = Comment.objects.select_related(
+        'author', 'post__author').in_bulk(
+        {comment_id for comment_id, _ in calls})
+    for comment_id, created in calls:
+        comment = comments.get(comment_id)
+        if comment is None:
+            continue
+        search_backend().index(comment)
+        if created:
+            notify_post_author(comment)
+    post_ids = {comment.post_id for comment in comments.values()}
+    counters.reconcile_posts(post_ids)
+    invalidation.comments_counted(post_ids)
+
+
+@task(batch=True)
+def comments_deleted(calls):
+    for comment_id, _ in calls:
+        search_backend().remove(Comment(pk=comment_id))
+    post_ids = {post_id for _, post_id in calls}
+    counters.reconcile_posts(post_ids)
+    invalidation.comments_counted(post_ids)
+
+
+@task(batch=True)
+def follows_changed(calls):
+    """Дополнить или почистить ленты читателей и пересчитать подписки."""
+    users = set()
+    for user_id, author_id, created in calls:
+        if created:
+            timeline.backfill(user_id, author_id)
+        else:
+            timeline.prune(user_id, author_id)
+        invalidation.timeline_changed(user_id)
+        users.update((user_id, author_id))
+    counters.reconcile_authors(users)
+
+
+@task(batch=True)
+def groups_saved(calls):
+    for group in Group.objects.filter(
+            pk__in={group_id for group_id, in calls}):
+        search_backend().index(group)
+
+
+@task(batch=True)
+def groups_deleted(calls):
+    for group_id, in calls:
+        search_backend().remove(Group(pk=group_id))
@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from .. import benchmark, seeding
+from ..models import AuthorStats, Follow, Post, TimelineEntry
+
+
+class BenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_and_run(self):
+        """Набор данных создаётся, а прогон даёт метрики по сценариям."""
+        seeding.seed(users=20, groups=3, posts=60, comments=30, follows=40)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertEqual(AuthorStats.objects.count(), 20)
+        report = benchmark.run(requests_count=3)
+        self.assertEqual(set(report), set(benchmark.SCENARIOS))
+        for metrics in report.values():
+            self.assertEqual(metrics['requests'], 3)
+            self.assertEqual(metrics['errors'], 0)
+            self.assertLessEqual(metrics['p50'], metrics['p99'])
+            self.assertIsNotNone(metrics['queries'])
+
+    def test_compare_with_baseline(self):
+        report = {'index': {'p50': 15.0, 'rps': 50.0, 'queries': 3}}
+        baseline = {'index': {'p50': 10.0, 'rps': 100.0, 'queries': 3}}
+        changes = benchmark.compare(report, baseline)
+        self.assertEqual(
+            changes['index'], {'p50': 50.0, 'rps': -50.0, 'queries': 0.0})
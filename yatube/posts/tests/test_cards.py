@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import cards
+from ..templatetags import post_cards
+from ..models import Group, Post, User
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый текст')
+        Post.objects.create(author=cls.author, text='Второй текст')
+
+    def setUp(self):
+        cache.clear()
+
+    def feed(self):
+        return Post.objects.for_feed().order_by('-pk')
+
+    def test_cards_are_read_with_one_get_many(self):
+        cards.render_cards(self.feed())
+        with mock.patch.object(cards.cache, 'get_many',
+                               wraps=cards.cache.get_many) as get_many, \
+                mock.patch.object(cards, 'render_to_string') as render:
+            rendered = cards.render_cards(self.feed())
+        get_many.assert_called_once()
+        render.assert_not_called()
+        self.assertIn('Первый текст', rendered[1][1])
+
+    def test_version_changes_with_card_content(self):
+        version = cards.card_version(self.feed().get(pk=self.post.pk))
+        self.author.first_name = 'Новое'
+        self.author.save()
+        renamed = cards.card_version(self.feed().get(pk=self.post.pk))
+        self.assertNotEqual(version, renamed)
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        self.assertNotEqual(
+            renamed, cards.card_version(self.feed().get(pk=self.post.pk)))
+
+    def test_edited_post_is_rendered_again(self):
+        self.client.get(reverse('posts:index'))
+        self.post.text = 'Исправленный текст'
+        self.post.save()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный текст')
+
+    def test_every_feed_uses_cached_cards(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with mock.patch.object(post_cards, 'render_cards',
+                                       wraps=cards.render_cards) as render:
+                    self.client.get(url)
+                render.assert_called_once()
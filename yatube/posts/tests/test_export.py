@@ -0,0 +1,69 @@
+import csv
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост автора')
+        Post.objects.create(author=cls.other, text='Чужой пост')
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Ответ автора')
+        Comment.objects.create(
+            post=cls.post, author=cls.other, text='Чужой ответ')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def export(self, **params):
+        response = self.client.get(reverse('posts:export'), params)
+        if not response.streaming:
+            return response, None
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_author_ndjson(self):
+        response, content = self.export(author='author')
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [(row['type'], row['text']) for row in rows],
+            [('post', 'Пост автора'), ('comment', 'Ответ автора')],
+        )
+        self.assertEqual(rows[0]['group'], 'group')
+        self.assertEqual(rows[1]['post'], self.post.pk)
+
+    def test_group_csv(self):
+        response, content = self.export(group='group', format='csv')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['type'], 'post')
+        self.assertEqual(rows[0]['image'], '')
+
+    def test_site_export_requires_staff(self):
+        self.assertEqual(self.export()[0].status_code, 403)
+        self.client.force_login(self.staff)
+        response, content = self.export()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(content.splitlines()), 4)
+        self.assertEqual(self.export(format='xml')[0].status_code, 400)
+
+    def test_command(self):
+        output = StringIO()
+        call_command('export_posts', author='author', format='csv',
+                     chunk_size=1, stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), 3)
@@ -1,7 +1,8 @@
 
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.core.cache import cache
-from ..models import Follow, Post, User
+from .. import counters, timeline
+from ..models import Follow, Post, TimelineEntry, User
 from django.urls import reverse
 
 CONST_FOLLOW = 1
@@ -59,3 +60,57 @@ class FollowTest(TestCase):
                                    text="Подпишись")
         response = self.authorized_client.get(reverse('posts:follow_index'))
         self.assertNotIn(post, response.context['page_obj'].object_list)
+
+    def test_new_post_fanned_out_to_followers(self):
+        """Новый пост попадает в материализованную ленту подписчика."""
+        Follow.objects.create(user=self.post_follower,
+                              author=self.post_author)
+        post = Post.objects.create(author=self.post_author,
+                                   text="Новый пост")
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.post_follower, post=post).exists())
+
+    def test_follow_backfills_and_unfollow_prunes_timeline(self):
+        """Подписка заполняет ленту, отписка очищает её."""
+        self.authorized_client.post(
+            reverse('posts:profile_follow',
+                    kwargs={'username': self.post_author}))
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.post_follower, post=self.post).exists())
+        self.authorized_client.post(
+            reverse('posts:profile_unfollow',
+                    kwargs={'username': self.post_author}))
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.post_follower).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_pull_author_posts_read_on_request(self):
+        """Посты популярного автора дочитываются при открытии ленты."""
+        Follow.objects.create(user=self.post_follower,
+                              author=self.post_author)
+        cache.clear()
+        post = Post.objects.create(author=self.post_author,
+                                   text="Пост популярного автора")
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['page_obj'].object_list)
+
+
+class TimelineRebuildTest(TestCase):
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, TIMELINE_BACKFILL_LIMIT=2)
+    def test_rebuild_skips_pull_authors_and_caps_posts(self):
+        """Перестройка лент повторяет правила раскладки и подписки."""
+        popular, author, first, second = (
+            User.objects.create(username=name)
+            for name in ('popular', 'author', 'first', 'second'))
+        for user in (first, second):
+            Follow.objects.create(user=user, author=popular)
+        Follow.objects.create(user=first, author=author)
+        Post.objects.create(author=popular, text='Популярный пост')
+        posts = [Post.objects.create(author=author, text=f'Пост {i}')
+                 for i in range(3)]
+        counters.recount()
+        timeline.rebuild()
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list('user_id', 'post_id')),
+            {(first.pk, post.pk) for post in posts[1:]})
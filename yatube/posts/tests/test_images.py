@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from .. import benchmark
+from ..images import normalize
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+EXIF_ORIENTATION = 0x0112
+
+
+def upload(name, size, mode='RGB', image_format='JPEG', orientation=None):
+    image = Image.new(mode, size, 'red')
+    output = BytesIO()
+    options = {}
+    if orientation:
+        exif = Image.Exif()
+        exif[EXIF_ORIENTATION] = orientation
+        options['exif'] = exif.tobytes()
+    image.save(output, image_format, **options)
+    return SimpleUploadedFile(name, output.getvalue())
+
+
+@override_settings(IMAGE_MAX_SIDE=100, IMAGE_FORMAT='JPEG')
+class NormalizeTest(TestCase):
+    def test_caps_size_and_strips_exif(self):
+        """Большое фото уменьшается, поворачивается по EXIF и теряет его."""
+        normalized = normalize(
+            upload('photo.jpeg', (400, 200), orientation=6))
+        image = Image.open(normalized)
+        self.assertEqual(normalized.name, 'photo.jpg')
+        self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(image.size, (50, 100))
+        self.assertNotIn(EXIF_ORIENTATION, image.getexif())
+
+    def test_keeps_transparency(self):
+        normalized = normalize(
+            upload('logo.png', (20, 20), 'RGBA', 'PNG'))
+        image = Image.open(normalized)
+        self.assertEqual(normalized.name, 'logo.png')
+        self.assertEqual(image.mode, 'RGBA')
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_rejects_too_many_pixels(self):
+        with self.assertRaises(ValidationError):
+            normalize(upload('huge.jpg', (20, 20)))
+
+    def test_unsupported_format_falls_back_to_jpeg(self):
+        with self.settings(IMAGE_FORMAT='NOPE'):
+            normalized = normalize(upload('photo.png', (10, 10),
+                                          image_format='PNG'))
+        self.assertEqual(normalized.name, 'photo.jpg')
+
+    def test_benchmark_reports_decoded_size(self):
+        report = benchmark.upload_images(sizes=((800, 400),), repeat=1)
+        metrics = report['800x400']
+        self.assertLess(metrics['decoded_mb'], metrics['full_mb'])
+        self.assertLess(metrics['output_kb'], metrics['input_kb'])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_MAX_SIDE=100,
+                   IMAGE_FORMAT='JPEG')
+class UploadTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_create_post_stores_normalized_master(self):
+        user = User.objects.create_user(username='author')
+        self.client.force_login(user)
+        self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с фото',
+            'image': upload('camera.jpeg', (300, 150), orientation=3),
+        })
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        self.assertEqual(Image.open(post.image.path).size, (100, 50))
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_form_error_for_oversized_image(self):
+        user = User.objects.create_user(username='author')
+        self.client.force_login(user)
+        response = self.client.post(reverse('posts:post_create'), {
+            'text': 'Пост с фото',
+            'image': upload('huge.jpg', (20, 20)),
+        })
+        self.assertFormError(response, 'form', 'image',
+                             'Изображение 20×20 слишком большое.')
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import AuthorStats, Follow, Group, Post, TimelineEntry, User
+from ..search import get_backend as search_backend
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        with open(os.path.join(cls.source, 'small.gif'), 'wb') as image:
+            image.write(SMALL_GIF)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(cls.source, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.source, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        return path
+
+    def test_ndjson_with_images_and_missing_authors(self):
+        User.objects.create_user(username='known')
+        rows = [
+            {'author': 'known', 'text': 'Первый', 'group': 'news',
+             'pub_date': '2020-01-02T03:04:05+00:00', 'image': 'small.gif'},
+            {'author': 'new', 'text': 'Второй', 'image': 'missing.gif'},
+            {'type': 'comment', 'author': 'known', 'text': 'Комментарий'},
+            {'author': 'known', 'text': ''},
+        ]
+        path = self.write('posts.ndjson', '\n'.join(map(json.dumps, rows)))
+        output = StringIO()
+        call_command('import_posts', path, batch_size=1, create_missing=True,
+                     images_dir=self.source, stdout=output)
+        self.assertEqual(Post.objects.count(), 2)
+        first = Post.objects.get(text='Первый')
+        self.assertEqual(first.group, Group.objects.get(slug='news'))
+        self.assertEqual(first.pub_date.year, 2020)
+        self.assertTrue(first.image.name.startswith('posts/'))
+        self.assertTrue(os.path.exists(first.image.path))
+        self.assertEqual(Post.objects.get(text='Второй').image, '')
+        self.assertEqual(
+            AuthorStats.objects.get(user__username='known').posts_count, 1)
+        self.assertIn('пропущено: 1', output.getvalue())
+
+    def test_csv_skips_unknown_authors(self):
+        User.objects.create_user(username='known')
+        path = self.write(
+            'posts.csv',
+            'author,text,group\nknown,Пост,\nunknown,Пост,\n')
+        call_command('import_posts', path, skip_rebuild=True,
+                     stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertFalse(User.objects.filter(username='unknown').exists())
+
+    def test_cached_feeds_show_imported_posts(self):
+        cache.clear()
+        User.objects.create_user(username='known')
+        urls = (reverse('posts:index'),
+                reverse('posts:profile', args=['known']))
+        for url in urls:
+            self.client.get(url)
+        path = self.write('posts.ndjson', json.dumps(
+            {'author': 'known', 'text': 'Импортированный пост'}))
+        call_command('import_posts', path, stdout=StringIO())
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url),
+                                    'Импортированный пост')
+
+    def test_bad_dates_are_skipped(self):
+        User.objects.create_user(username='known')
+        rows = [
+            {'author': 'known', 'text': 'Вчера', 'pub_date': 'yesterday'},
+            {'author': 'known', 'text': 'Нет дня',
+             'pub_date': '2020-02-30T10:00:00'},
+            {'author': 'known', 'text': 'Без пояса',
+             'pub_date': '2020-01-02T03:04:05'},
+        ]
+        path = self.write('posts.ndjson', '\n'.join(map(json.dumps, rows)))
+        output = StringIO()
+        call_command('import_posts', path, skip_rebuild=True, stdout=output)
+        post = Post.objects.get()
+        self.assertEqual(post.text, 'Без пояса')
+        self.assertTrue(timezone.is_aware(post.pub_date))
+        self.assertIn('пропущено: 2', output.getvalue())
+
+    def test_malformed_json_lines_are_skipped(self):
+        User.objects.create_user(username='known')
+        path = self.write('posts.ndjson', '\n'.join((
+            '{"author": "known", "text": "Первый"}',
+            '{"author": "known", "text": ',
+            '[1, 2]',
+            '{"author": "known", "text": "Второй"}',
+        )))
+        output = StringIO()
+        call_command('import_posts', path, skip_rebuild=True, stdout=output)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertIn('пропущено: 2', output.getvalue())
+
+    def test_rebuild_covers_imported_authors(self):
+        """Счётчики, ленты подписчиков и поиск обновляются по загруженным
+        постам без полного пересчёта."""
+        author = User.objects.create_user(username='known')
+        follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=follower, author=author)
+        path = self.write('posts.ndjson', json.dumps(
+            {'author': 'known', 'text': 'Импортированный пост'}))
+        call_command('import_posts', path, stdout=StringIO())
+        post = Post.objects.get(text='Импортированный пост')
+        self.assertEqual(AuthorStats.objects.get(user=author).posts_count, 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=follower, post=post).exists())
+        hits, _ = search_backend().search('Импортированный')
+        self.assertEqual([hit.object for hit in hits], [post])
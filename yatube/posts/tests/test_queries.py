@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..utils import CONST_POST
+
+
+class FeedQueriesTest(TestCase):
+    """Число запросов view не зависит от размера страницы."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group)
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def _fill(self):
+        for i in range(CONST_POST):
+            commenter = User.objects.create_user(username=f'user{i}')
+            Post.objects.create(
+                author=self.author, text=f'Пост {i}', group=self.group)
+            Comment.objects.create(
+                post=self.post, author=commenter, text=f'Ок {i}')
+
+    def _assert_constant(self, url, queries):
+        for fill in (False, True):
+            if fill:
+                self._fill()
+            cache.clear()
+            with self.subTest(url=url, full_page=fill):
+                with self.assertNumQueries(queries):
+                    self.client.get(url)
+
+    def test_index(self):
+        self._assert_constant(reverse('posts:index'), 3)
+
+    def test_group_list(self):
+        self._assert_constant(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}), 4)
+
+    def test_profile(self):
+        self._assert_constant(
+            reverse('posts:profile', kwargs={'username': self.author}), 5)
+
+    def test_post_detail(self):
+        self._assert_constant(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            5)
+
+    def test_follow_index(self):
+        self._assert_constant(reverse('posts:follow_index'), 4)
@@ -0,0 +1,76 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.paginator import CursorPaginator
+
+from .. import timeline
+from ..models import Comment, Follow, Group, Post, User
+from ..utils import CONST_POST
+
+
+def plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def problems(details, ordered_scan=False):
+    """Просмотр таблицы вместо поиска по индексу и сортировка во временном
+    дереве.
+
+    С `ordered_scan` допустим обход таблицы по индексу в порядке
+    ORDER BY с LIMIT: так главная лента читается с начала.
+    """
+    return [
+        detail for detail in details
+        if 'TEMP B-TREE' in detail
+        or (detail.startswith('SCAN')
+            and not (ordered_scan and 'USING INDEX' in detail))
+    ]
+
+
+class FeedQueryPlansTest(TestCase):
+    """Запросы лент читают по индексам без сортировки в памяти."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group)
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Ок')
+
+    def feeds(self):
+        return {
+            'index': (Post.objects.for_feed(), 'pub_date'),
+            'group': (Post.objects.for_feed().filter(group=self.group),
+                      'pub_date'),
+            'profile': (self.author.posts.for_feed(), 'pub_date'),
+            'follow': (timeline.follow_entries(self.reader), 'pub_date'),
+            'comments': (Comment.objects.filter(
+                post=self.post).select_related('author'), 'created'),
+        }
+
+    def test_feed_queries_use_indexes(self):
+        for name, (queryset, key) in self.feeds().items():
+            paginator = CursorPaginator(queryset, CONST_POST, key=key)
+            cursor = paginator.encode_cursor(queryset.first())
+            for page in ({}, {'after': cursor}, {'before': cursor}):
+                with CaptureQueriesContext(connection) as queries:
+                    paginator.page(**page)
+                for query in queries:
+                    details = plan(query['sql'])
+                    with self.subTest(feed=name, page=page, plan=details):
+                        self.assertEqual(
+                            problems(details, ordered_scan=name == 'index'),
+                            [])
+
+    def test_follow_lookup_uses_unique_index(self):
+        queryset = Follow.objects.filter(user=self.reader, author=self.author)
+        details = plan(str(queryset.query))
+        self.assertEqual(problems(details), [])
+        self.assertTrue(
+            any('user_id=? AND author_id=?' in detail for detail in details),
+            details)
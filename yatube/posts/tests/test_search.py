@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+from ..search import SEARCH_TABLE
+from ..utils import CONST_POST
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Кошки', slug='cats')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Кошки спят целый день', group=cls.group)
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.user, text='Мои кошки тоже')
+        Post.objects.create(author=cls.user, text='Собаки гуляют')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def _search(self, query, after=None):
+        params = {'q': query}
+        if after:
+            params['after'] = after
+        return self.guest_client.get(reverse('posts:search'), params)
+
+    def test_search_posts_comments_and_groups(self):
+        """Поиск находит посты, комментарии и группы."""
+        response = self._search('кошки')
+        found = {(hit.kind, hit.object.pk) for hit in response.context['hits']}
+        self.assertEqual(found, {
+            ('post', self.post.pk),
+            ('comment', self.comment.pk),
+            ('group', self.group.pk),
+        })
+
+    def test_deleted_post_removed_from_index(self):
+        post = Post.objects.create(author=self.user, text='Редкое слово')
+        post.delete()
+        self.assertEqual(self._search('редкое').context['hits'], [])
+
+    def test_cursor_pagination(self):
+        """Результаты разбиты на страницы курсором."""
+        for i in range(CONST_POST + 2):
+            Post.objects.create(author=self.user, text=f'Попугай номер {i}')
+        first = self._search('попугай').context
+        self.assertEqual(len(first['hits']), CONST_POST)
+        second = self._search('попугай', first['next_cursor']).context
+        self.assertEqual(len(second['hits']), 2)
+        self.assertIsNone(second['next_cursor'])
+        pages = {hit.object.pk for hit in first['hits'] + second['hits']}
+        self.assertEqual(len(pages), CONST_POST + 2)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self._search('собаки').context['hits']), 1)
@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from collections import Counter
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from .. import seeding
+from ..models import Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedingTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_command_creates_dataset(self):
+        call_command('seed_yatube', users=30, groups=3, posts=200,
+                     comments=100, follows=60, chunk_size=50, images=0.5,
+                     stdout=StringIO())
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertEqual(
+            Post.objects.values('pub_date').distinct().count(), 200)
+
+    def test_authors_follow_power_law(self):
+        seeding.seed(users=50, groups=0, posts=500, comments=0, follows=0)
+        posts = Counter(Post.objects.values_list('author_id', flat=True))
+        counts = sorted(posts.values(), reverse=True)
+        self.assertGreater(counts[0], 10 * counts[len(counts) // 2])
+
+    def test_chunks_larger_than_sqlite_limits(self):
+        """Пачка больше 500 строк пишется без ошибки SQLite."""
+        seeder = seeding.Seeder(chunk_size=1000)
+        seeder.users(600)
+        seeder.follows(1800)
+        self.assertEqual(User.objects.count(), 600)
+        self.assertGreater(Follow.objects.count(), 500)
+
+    def test_resume_continues_from_missing_chunk(self):
+        """Прерванная генерация дописывает только недостающие пачки."""
+        seeder = seeding.Seeder(chunk_size=10)
+        seeder.users(20)
+        seeder.posts(30)
+        first = list(Post.objects.order_by('pk').values_list(
+            'author_id', 'text', 'pub_date'))
+        first_pk = Post.objects.order_by('pk').first().pk
+        Post.objects.filter(pk__gte=first_pk + 20).delete()
+        seeding.Seeder(chunk_size=10).posts(30)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'author_id', 'text', 'pub_date')),
+            first,
+        )
+        seeder.users(40)
+        self.assertEqual(User.objects.count(), 40)
+        seeder.users(40)
+        self.assertEqual(User.objects.count(), 40)
+        seeder.follows(40)
+        follows = Follow.objects.count()
+        seeder.follows(40)
+        self.assertEqual(Follow.objects.count(), follows)
+
+    def test_resume_completes_partial_chunk(self):
+        """Повторный запуск не дублирует недописанную последнюю пачку."""
+        seeder = seeding.Seeder(chunk_size=10)
+        seeder.users(15)
+        seeder.users(15)
+        self.assertEqual(User.objects.count(), 15)
+        seeder.posts(15)
+        first = list(Post.objects.order_by('pk').values_list(
+            'author_id', 'text', 'pub_date'))
+        seeder.posts(15)
+        self.assertEqual(Post.objects.count(), 15)
+        Post.objects.filter(pk__in=Post.objects.order_by(
+            '-pk').values_list('pk', flat=True)[:3]).delete()
+        seeder.posts(15)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list(
+                'author_id', 'text', 'pub_date')),
+            first,
+        )
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .. import tasks, thumbnails
+from ..models import Post, User
+from ..storage import content_storage, is_claimed
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def post(self, name='small.gif', content=SMALL_GIF):
+        post = Post(author=self.user, text='Пост')
+        post.image.save(name, ContentFile(content))
+        return post
+
+    def test_identical_uploads_share_file(self):
+        first = content_storage.save('posts/a.gif', ContentFile(SMALL_GIF))
+        second = content_storage.save('posts/b.GIF', ContentFile(SMALL_GIF))
+        other = content_storage.save('posts/a.gif', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(
+            first, r'^posts/(\w\w)/(\w\w)/\1\2[0-9a-f]{60}\.gif$')
+        self.assertEqual(
+            os.listdir(os.path.dirname(content_storage.path(first))),
+            [os.path.basename(first)])
+
+    def test_thumbnail_shared_between_posts(self):
+        first, second = self.post(), self.post('copy.gif')
+        second.refresh_from_db()
+        self.assertTrue(second.thumbnail_url)
+        self.assertEqual(
+            second.thumbnail_url,
+            Post.objects.get(pk=first.pk).thumbnail_url)
+        Post.objects.filter(pk=first.pk).update(
+            thumbnail_url='/media/cache/shared.jpg')
+        thumbnails.generate(second.pk)
+        second.refresh_from_db()
+        self.assertEqual(second.thumbnail_url, '/media/cache/shared.jpg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageReleaseTest(TransactionTestCase):
+    """Удаление файлов после коммита, поэтому без обёртки TestCase."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+
+    def post(self, name='small.gif'):
+        post = Post(author=self.user, text='Пост')
+        post.image.save(name, ContentFile(SMALL_GIF))
+        return post
+
+    def test_file_removed_with_last_reference(self):
+        first, second = self.post(), self.post('copy.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertFalse(is_claimed(first.image.name))
+        path = first.image.path
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.image = ''
+        second.save()
+        self.assertFalse(os.path.exists(path))
+
+    def test_rolled_back_delete_keeps_file(self):
+        post = self.post()
+        path = post.image.path
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            post.delete()
+            raise RuntimeError
+        self.assertTrue(os.path.exists(path))
+
+    def test_file_reused_by_pending_upload_is_kept(self):
+        post = self.post()
+        path = post.image.path
+        Post.objects.filter(pk=post.pk).update(image='')
+        name = content_storage.save('posts/again.gif',
+                                    ContentFile(SMALL_GIF))
+        self.assertTrue(is_claimed(name))
+        tasks.images_released([[name]])
+        self.assertTrue(os.path.exists(path))
@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Task
+from core.tasks import get_backend
+
+from ..models import AuthorStats, Comment, Follow, Post, TimelineEntry, User
+
+
+class QueuedSideEffectsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @override_settings(TASK_BACKEND='core.tasks.DatabaseBackend')
+    def test_post_write_is_a_single_queued_task(self):
+        client = Client()
+        client.force_login(self.author)
+        client.post(reverse('posts:post_create'), {'text': 'Новый пост'})
+        get_backend().flush()
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertFalse(TimelineEntry.objects.exists())
+        call_command('run_tasks', once=True, stdout=StringIO())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.reader).exists())
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 1)
+
+    @override_settings(TASK_BACKEND='core.tasks.DatabaseBackend')
+    def test_cached_pages_show_recounted_counters(self):
+        """Страницы, собранные до пересчёта счётчиков, сбрасываются."""
+        cache.clear()
+        post = Post.objects.create(author=self.author, text='Пост')
+        other = Post.objects.create(author=self.author, text='Второй')
+        Comment.objects.create(post=post, author=self.reader, text='Да')
+        get_backend().flush()
+        url = reverse('posts:post_detail', args=[post.pk])
+        client = Client()
+        get_backend().work()
+        self.assertContains(client.get(url), 'Комментариев: 1')
+        Comment.objects.create(post=post, author=self.reader, text='Ещё')
+        other.delete()
+        get_backend().flush()
+        response = client.get(url)
+        self.assertContains(response, 'Комментариев: 1')
+        get_backend().work()
+        response = client.get(url)
+        self.assertContains(response, 'Комментариев: 2')
+        self.assertContains(
+            response, 'Всего постов автора:  <span >1</span>', html=False)
+
+    @override_settings(TASK_BACKEND='core.tasks.DatabaseBackend')
+    def test_follow_feeds_reset_by_task(self):
+        """Ленты подписчиков сбрасывает задача, а не сохранение поста."""
+        cache.clear()
+        post = Post.objects.create(author=self.author, text='Старый текст')
+        get_backend().flush()
+        get_backend().work()
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:follow_index')
+        self.assertContains(client.get(url), 'Старый текст')
+        post.text = 'Новый текст'
+        post.save()
+        get_backend().flush()
+        self.assertContains(client.get(url), 'Старый текст')
+        get_backend().work()
+        self.assertContains(client.get(url), 'Новый текст')
+
+    def test_comment_notifies_post_author(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        client = Client()
+        client.force_login(self.reader)
+        client.post(reverse('posts:add_comment', args=[post.pk]),
+                    {'text': 'Отличный пост'})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['author@example.com'])
+        self.assertIn('Отличный пост', mail.outbox[0].body)
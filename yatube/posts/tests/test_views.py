@@ -1,12 +1,13 @@
+import re
 
 from django import forms
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.core.cache import cache
 
-from ..views import CONST_POST
+from ..utils import CONST_POST
 
-from ..models import Group, Post, User
+from ..models import Comment, Group, Post, User
 
 CONST_POST1 = 3
 CONST_POST2 = 13
@@ -110,17 +111,105 @@ class PostViewsTests(TestCase):
                 self.assertIsInstance(form_field, expected)
 
     def test_cache(self):
+        """Главная страница кэшируется до изменения постов."""
         response = self.authorized_client.get(reverse('posts:index'))
-        with_cache = response.content
-        first_post = Post.objects.get(id=1)
-        first_post.delete()
+        self.assertIsNotNone(response.context)
         response = self.authorized_client.get(reverse('posts:index'))
-        after_delete_bd = response.content
+        self.assertIsNone(response.context, 'Страница не взята из кэша')
         cache.clear()
         response = self.authorized_client.get(reverse('posts:index'))
-        after_clean_cache = response.content
-        self.assertEqual(with_cache, after_delete_bd, 'Ошибка')
-        self.assertNotEqual(after_delete_bd, after_clean_cache, 'Ошибка')
+        self.assertIsNotNone(response.context)
+
+    def test_cache_is_per_user(self):
+        """Закэшированная страница не достаётся другому пользователю."""
+        other = User.objects.create_user(username='other')
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        author_client = Client(enforce_csrf_checks=True)
+        author_client.force_login(self.user)
+        for _ in range(3):
+            author_client.get(url)
+        self.assertNotContains(self.guest_client.get(url),
+                               'Пользователь: qwerty')
+        other_client = Client(enforce_csrf_checks=True)
+        other_client.force_login(other)
+        for _ in range(2):
+            response = other_client.get(url)
+            self.assertContains(response, 'Пользователь: other')
+        token = re.search(r'name="csrfmiddlewaretoken" value="(\w+)"',
+                          response.content.decode()).group(1)
+        response = other_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий', 'csrfmiddlewaretoken': token})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Comment.objects.filter(author=other).exists())
+
+    def test_cache_invalidated_on_post_change(self):
+        """Изменение поста сбрасывает кэш затронутых лент."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        )
+        for url in urls:
+            self.authorized_client.get(url)
+        post = Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertIn(post, response.context['page_obj'])
+
+    def test_group_description_keeps_feeds_cached(self):
+        """Описание группы сбрасывает только её страницу, название — все
+        ленты."""
+        index = reverse('posts:index')
+        group_list = reverse('posts:group_list',
+                             kwargs={'slug': self.group.slug})
+        for url in (index, group_list):
+            self.guest_client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.description = 'Новое описание'
+        group.save()
+        self.assertIsNone(self.guest_client.get(index).context)
+        self.assertContains(self.guest_client.get(group_list),
+                            'Новое описание')
+        group.title = 'Новое название'
+        group.save()
+        self.assertIsNotNone(self.guest_client.get(index).context)
+
+    def test_conditional_get(self):
+        """Повторный запрос с валидатором получает 304 до изменения."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                etag = response['ETag']
+                self.assertEqual(self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                self.assertEqual(self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                ).status_code, 304)
+                self.assertNotEqual(
+                    self.authorized_client.get(url)['ETag'], etag)
+        response = self.guest_client.get(urls[-1])
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'})
+        self.assertEqual(self.guest_client.get(
+            urls[-1], HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_cache_control_headers(self):
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        self.assertFalse(response.has_header('Expires'))
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertIn('private', response['Cache-Control'])
 
 
 class PaginatorViewsTest(TestCase):
@@ -154,8 +243,28 @@ class PaginatorViewsTest(TestCase):
         self.assertEqual(len(response.context['page_obj']), CONST_POST)
 
     def test_second_page_contains_three_records(self):
-        response = self.client.get(reverse('posts:index') + '?page=2')
+        response = self.client.get(reverse('posts:index'))
+        cursor = response.context['page_obj'].next_cursor
+        response = self.client.get(reverse('posts:index') + f'?after={cursor}')
         self.assertEqual(len(response.context['page_obj']), CONST_POST1)
+        self.assertFalse(response.context['page_obj'].has_next())
+
+    def test_previous_page_returns_first_page(self):
+        """Курсор before возвращает на первую страницу."""
+        first = self.client.get(reverse('posts:index')).context['page_obj']
+        second = self.client.get(
+            reverse('posts:index') + f'?after={first.next_cursor}'
+        ).context['page_obj']
+        response = self.client.get(
+            reverse('posts:index') + f'?before={second.previous_cursor}')
+        self.assertEqual(
+            list(response.context['page_obj']), list(first))
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        response = self.client.get(reverse('posts:index') + '?after=abc')
+        self.assertEqual(len(response.context['page_obj']), CONST_POST)
+        self.assertFalse(response.context['page_obj'].has_previous())
 
     def test_first_page_group_list_contains_ten_records(self):
         response = self.client.get(reverse(
@@ -166,3 +275,39 @@ class PaginatorViewsTest(TestCase):
         response = self.authorized_client.get(reverse(
             'posts:profile', kwargs={'username': 'saint'}))
         self.assertEqual(len(response.context['page_obj']), CONST_POST)
+
+
+@override_settings(COMMENTS_PER_PAGE=2)
+class CommentsPaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_detail_shows_first_page_and_total(self):
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        comments = response.context['comments']
+        self.assertEqual([comment.text for comment in comments],
+                         ['Комментарий 2', 'Комментарий 1'])
+        self.assertContains(response, 'Комментариев: 3')
+        self.assertContains(response, 'data-load-more')
+
+    def test_load_more_returns_next_page(self):
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        cursor = response.context['comments'].next_cursor
+        response = self.client.get(reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.pk}
+        ) + f'?after={cursor}')
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Комментарий 0'])
+        self.assertNotContains(response, 'data-load-more')
@@ -0,0 +1,49 @@
+import logging
+
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from . import invalidation
+from .models import Post
+
+FEED_THUMBNAIL = '960x339'
+FEED_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+logger = logging.getLogger(__name__)
+
+
+def generate(post_id):
+    """Построить миниатюру поста и сохранить её адрес в посте."""
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id).first()
+    if post is None or not post.image:
+        return
+    shared = Post.objects.filter(image=post.image.name).exclude(
+        pk=post.pk).exclude(thumbnail_url='').values_list(
+        'thumbnail_url', flat=True).first()
+    if shared:
+        _store(post, shared)
+        return
+    try:
+        thumbnail = get_thumbnail(
+            post.image, FEED_THUMBNAIL, **FEED_THUMBNAIL_OPTIONS)
+    except Exception:
+        logger.exception('Не удалось построить миниатюру поста %s', post_id)
+        return
+    _store(post, thumbnail.url)
+
+
+def _store(post, url):
+    updated = Post.objects.filter(pk=post.pk, image=post.image.name).update(
+        thumbnail_url=url)
+    if updated:
+        invalidation.post_changed(post)
+        invalidation.follow_feeds_changed({post.author_id})
+
+
+def delete(name):
+    """Удалить картинку вместе с её миниатюрами."""
+    image_file = ImageFile(
+        name, storage=Post._meta.get_field('image').storage)
+    default.kvstore.delete(image_file)
+    image_file.delete()
@@ -0,0 +1,159 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max, Q
+
+from .models import AuthorStats, FEED_FIELDS, Follow, Post, TimelineEntry
+from .utils import paginate
+
+PULL_AUTHORS_KEY = 'timeline:pull_authors'
+PULL_AUTHORS_TIMEOUT = 300
+
+
+def pull_authors():
+    """Авторы, чьи посты не раскладываются по лентам, а читаются при запросе.
+
+    Раскладывать пост по лентам тысяч подписчиков дорого, поэтому для
+    авторов с числом подписчиков больше `TIMELINE_FANOUT_LIMIT` лента
+    дополняется их постами в момент чтения. Число подписчиков берётся
+    из AuthorStats по индексу, без группировки всех подписок.
+    """
+    authors = cache.get(PULL_AUTHORS_KEY)
+    if authors is None:
+        authors = set(AuthorStats.objects.filter(
+            followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+        ).values_list('user_id', flat=True))
+        cache.set(PULL_AUTHORS_KEY, authors, PULL_AUTHORS_TIMEOUT)
+    return authors
+
+
+def _entries(user_ids, posts):
+    return [
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in user_ids
+        for post in posts
+    ]
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def fan_out(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    if post.author_id in pull_authors():
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    _insert(_entries(followers, [post]))
+
+
+def backfill(user_id, author_id):
+    """Добавить в ленту последние посты автора после подписки."""
+    posts = Post.objects.filter(author_id=author_id).only(
+        'pk', 'author_id', 'pub_date')[:settings.TIMELINE_BACKFILL_LIMIT]
+    _insert(_entries([user_id], posts))
+
+
+def prune(user_id, author_id):
+    """Убрать посты автора из ленты после отписки."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def pull(user):
+    """Дочитать в ленту свежие посты популярных авторов."""
+    authors = Follow.objects.filter(
+        user=user, author__in=pull_authors()
+    ).values_list('author_id', flat=True)
+    authors = set(authors)
+    if not authors:
+        return
+    latest = dict(
+        TimelineEntry.objects.filter(user=user, author__in=authors)
+        .values('author')
+        .annotate(latest=Max('pub_date'))
+        .values_list('author', 'latest')
+    )
+    condition = Q()
+    for author in authors:
+        if author in latest:
+            condition |= Q(author_id=author, pub_date__gt=latest[author])
+        else:
+            condition |= Q(author_id=author)
+    posts = Post.objects.filter(condition).only(
+        'pk', 'author_id', 'pub_date')[:settings.TIMELINE_BACKFILL_LIMIT]
+    _insert(_entries([user.pk], posts))
+
+
+def _insert_latest(author_ids=None):
+    """Разложить последние посты авторов по лентам их подписчиков."""
+    condition = ''
+    params = [settings.TIMELINE_FANOUT_LIMIT]
+    if author_ids is not None:
+        condition = (
+            f'AND author_id IN ({", ".join(["%s"] * len(author_ids))}) ')
+        params += author_ids
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {TimelineEntry._meta.db_table} '
+            f'(user_id, post_id, author_id, pub_date) '
+            f'SELECT follow.user_id, post.id, post.author_id, post.pub_date '
+            f'FROM {Follow._meta.db_table} follow '
+            f'JOIN (SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+            f'PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+            f') AS position FROM {Post._meta.db_table} '
+            f'WHERE author_id NOT IN (SELECT user_id '
+            f'FROM {AuthorStats._meta.db_table} WHERE followers_count > %s) '
+            f'{condition}'
+            f') post ON post.author_id = follow.author_id '
+            f'WHERE post.position <= %s',
+            [*params, settings.TIMELINE_BACKFILL_LIMIT],
+        )
+
+
+def rebuild():
+    """Перестроить все ленты по подпискам одним INSERT ... SELECT.
+
+    Как и при раскладке по одному посту, авторы с числом подписчиков
+    больше `TIMELINE_FANOUT_LIMIT` пропускаются, а от остальных берутся
+    последние `TIMELINE_BACKFILL_LIMIT` постов. Число подписчиков
+    читается из AuthorStats, поэтому счётчики пересчитываются раньше.
+    """
+    cache.delete(PULL_AUTHORS_KEY)
+    TimelineEntry.objects.all().delete()
+    _insert_latest()
+
+
+def refresh(author_ids):
+    """Перестроить записи лент по постам авторов, загруженным в обход
+    сигналов."""
+    author_ids = list(author_ids)
+    if not author_ids:
+        return
+    TimelineEntry.objects.filter(author_id__in=author_ids).delete()
+    _insert_latest(author_ids)
+
+
+def follow_entries(user):
+    """Записи ленты подписок: диапазонное чтение по индексу (user, дата)."""
+    return TimelineEntry.objects.filter(
+        user=user
+    ).select_related('post__author', 'post__group').only(
+        'pub_date', 'post', *(f'post__{field}' for field in FEED_FIELDS))
+
+
+def follow_page(request):
+    """Страница ленты подписок."""
+    pull(request.user)
+    page_obj = paginate(request, follow_entries(request.user))
+    page_obj.object_list = [entry.post for entry in page_obj.object_list]
+    return page_obj
@@ -0,0 +1,24 @@
+from django.conf import settings
+
+from core.paginator import CursorPaginator
+
+CONST_POST = 10
+
+
+def paginate(request, queryset):
+    """Страница ленты по курсорам `?after=` / `?before=`."""
+    paginator = CursorPaginator(queryset, CONST_POST)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+
+def comments_page(post, after=None):
+    """Страница комментариев поста по курсору, новые сверху."""
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_PER_PAGE,
+        key='created',
+    )
+    return paginator.page(after=after)
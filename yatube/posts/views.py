@@ -1,19 +1,22 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from posts.forms import PostForm, CommentForm
+from core.cache import cache_by_generation
+from core.routing import read_from_replica
+from . import counters, export, invalidation, timeline
 from .models import Follow, Group, Post, User
-from django.views.decorators.cache import cache_page
+from .search import get_backend as search_backend
+from .utils import CONST_POST, comments_page, paginate
 
-CONST_POST = 10
 
-
-@cache_page(20, key_prefix='index_page')
+@read_from_replica
+@cache_by_generation(invalidation.index_scopes, settings.FEED_CACHE_TIMEOUT)
 def index(request):
-    posts = Post.objects.select_related('group', 'author').all()
-    paginator = Paginator(posts, CONST_POST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = Post.objects.for_feed()
+    page_obj = paginate(request, posts)
     context = {
         'posts': posts,
         'page_obj': page_obj,
@@ -21,12 +24,12 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@read_from_replica
+@cache_by_generation(invalidation.group_scopes, settings.FEED_CACHE_TIMEOUT)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('group')
-    paginator = Paginator(posts, CONST_POST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.for_feed()
+    page_obj = paginate(request, posts)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -34,13 +37,15 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@read_from_replica
+@cache_by_generation(invalidation.profile_scopes,
+                     settings.FEED_CACHE_TIMEOUT)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.select_related("author")
-    count = author.posts.count()
-    paginator = Paginator(posts, CONST_POST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    posts = author.posts.for_feed()
+    count = counters.stats_of(author).posts_count
+    page_obj = paginate(request, posts)
     follow = (request.user.is_authenticated and author != request.user
               and Follow.objects.filter(
                   author=author,
@@ -54,14 +59,18 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@read_from_replica
+@cache_by_generation(invalidation.post_detail_scopes,
+                     settings.FEED_CACHE_TIMEOUT)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id)
     pub_date = post.pub_date
     post_title = post.text[:30]
     author = post.author
-    author_posts = author.posts.all().count()
+    author_posts = counters.stats_of(author).posts_count
     form_comment = CommentForm()
-    comments = post.comments.all()
+    comments = comments_page(post)
     context = {
         'post': post,
         'post_title': post_title,
@@ -74,9 +83,58 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+@read_from_replica
+@cache_by_generation(invalidation.comments_scopes,
+                     settings.FEED_CACHE_TIMEOUT)
+def post_comments(request, post_id):
+    """Следующая страница комментариев для кнопки «Показать ещё»."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post': post,
+        'comments': comments_page(post, request.GET.get('after')),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '')
+    hits, next_cursor = search_backend().search(
+        query, after=request.GET.get('after'), limit=CONST_POST)
+    context = {
+        'query': query,
+        'hits': hits,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@login_required
+def export_posts(request):
+    author = request.GET.get('author')
+    group = request.GET.get('group')
+    output = request.GET.get('format', 'ndjson')
+    if output not in export.FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+    if author:
+        get_object_or_404(User, username=author)
+    if group:
+        get_object_or_404(Group, slug=group)
+    if not (author or group or request.user.is_staff):
+        raise PermissionDenied
+    render_rows, content_type = export.FORMATS[output]
+    response = StreamingHttpResponse(
+        render_rows(export.rows(author=author, group=group)),
+        content_type=f'{content_type}; charset=utf-8',
+    )
+    name = author or group or 'yatube'
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}.{output}"')
+    return response
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -117,12 +175,11 @@ def add_comment(request, post_id):
 
 
 @login_required
+@read_from_replica
+@cache_by_generation(invalidation.follow_scopes, settings.FEED_CACHE_TIMEOUT)
 def follow_index(request):
     template = 'posts/follow.html'
-    posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(posts, CONST_POST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = timeline.follow_page(request)
     context = {
         'page_obj': page_obj,
     }
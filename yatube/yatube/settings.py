@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -50,12 +51,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.ReplicaStickinessMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -65,7 +68,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.backends.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -90,9 +93,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['core.routing.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -134,6 +144,14 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+STATIC_MAX_AGE = 60 * 60
+
+if not DEBUG:
+    STATICFILES_STORAGE = (
+        'core.staticfiles.CompressedManifestStaticFilesStorage')
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -144,12 +162,112 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 NUMBER_OF_POSTS = 10
 
+COMMENTS_PER_PAGE = 20
+
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+MEDIA_MAX_AGE = 60 * 60 * 24
+
+# Отдача медиа фронтовым прокси: None — сам Django (через sendfile, если
+# его умеет WSGI-сервер), 'x-accel-redirect' — nginx, 'x-sendfile' —
+# Apache mod_xsendfile или lighttpd.
+MEDIA_SENDFILE = None
+
+# internal-локация nginx с alias на MEDIA_ROOT для X-Accel-Redirect.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+IMAGE_MAX_SIDE = 2048
+
+IMAGE_MAX_PIXELS = 50 * 1000 * 1000
+
+IMAGE_FORMAT = 'WEBP'
+
+IMAGE_QUALITY = 82
+
+IMAGE_CLAIM_TIMEOUT = 60 * 10
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache_backends.TwoTierCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_MAX_ENTRIES': 500,
+            'LOCAL_TIMEOUT': 300,
+            # core.cache.FEED_KEY и posts.cards.CARD_KEY.
+            'LOCAL_PREFIXES': ('feed:', 'card:'),
+        },
+    },
+    'shared': {
+        'BACKEND': 'core.cache_backends.SqliteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+# Общий кэш в Redis для нескольких серверов (нужен пакет redis):
+# CACHES['shared'] = {
+#     'BACKEND': 'core.cache_backends.RedisCache',
+#     'LOCATION': 'redis://127.0.0.1:6379/1',
+# }
+
+TIMELINE_FANOUT_LIMIT = 1000
+
+TIMELINE_BACKFILL_LIMIT = 1000
+
+TIMELINE_BATCH_SIZE = 500
+
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+
+FEED_SOFT_TIMEOUT = 60 * 60 * 5
+
+CACHE_LOCK_TIMEOUT = 10
+
+CACHE_LOCK_WAIT = 2
+
+CACHE_EARLY_BETA = 1.0
+
+FEED_MAX_AGE = 60
+
+METRICS_HISTORY = 1000
+
+QUERY_BUDGETS = {
+    'posts:index': 3,
+    'posts:group_list': 4,
+    'posts:profile': 5,
+    'posts:post_detail': 5,
+    # Сессия, пользователь, три чтения и INSERT дочитывания постов
+    # популярных авторов, страница ленты.
+    'posts:follow_index': 7,
 }
+
+QUERY_BUDGET_RAISE = False
+
+# Побочные эффекты записи (ленты, миниатюры, поиск, счётчики, письма)
+# выполняются вне потока запроса: пулом потоков процесса или, для
+# нескольких серверов, очередью в базе 'core.tasks.DatabaseBackend' с
+# воркером `manage.py run_tasks`.
+TASK_BACKEND = 'core.tasks.ThreadBackend'
+
+TASK_WORKERS = 2
+
+TASK_BATCH_SIZE = 100
+
+TASK_MAX_ATTEMPTS = 5
+
+TASK_RETRY_DELAY = 10
+
+TASK_LEASE = 300
+
+SEARCH_BACKEND = 'posts.search.SqliteFtsBackend'
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+DATABASE_REPLICAS = []
+
+REPLICA_STICKY_SECONDS = 10
+
+EXPORT_CHUNK_SIZE = 2000
@@ -0,0 +1,19 @@
+"""Настройки для запуска тестов поверх основных."""
+from .settings import *  # noqa: F401,F403
+
+# Тесты идут внутри транзакций, которые не фиксируются, поэтому задачи
+# выполняются сразу.
+TASK_BACKEND = 'core.tasks.ImmediateBackend'
+
+# Общий кэш тестов живёт в памяти процесса и не смешивается с кэшем
+# сервера разработки в cache.sqlite3.
+CACHES = {
+    **CACHES,  # noqa: F405
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yatube-tests',
+    },
+}
+
+# Превышение бюджета SQL-запросов view роняет тест.
+QUERY_BUDGET_RAISE = True